@@ -15,33 +15,111 @@ from __future__ import annotations
 
 import argparse
 import bisect
+import fcntl
+import heapq
 import json
+import math
+import mmap
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import subprocess
 import sys
+import tempfile
 import threading
 import time
-from collections import deque
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import BytesIO
 from pathlib import Path
 from typing import Final, TypeAlias
+from urllib.parse import parse_qs, urlparse
 
 import numpy as np
 import pygame
 import requests
 from PIL import Image
+from requests.adapters import HTTPAdapter
 
 # Type aliases
-ImageBuffer: TypeAlias = list[tuple[pygame.Surface, str, str]]  # (surface, timestamp, image_id)
+Frame: TypeAlias = tuple[bytes, str, str]  # (jpeg bytes, timestamp, image_id)
 SourceId: TypeAlias = int
 
 # Constants
-CACHE_DIR: Final = Path("/tmp/sun_viewer_cache")
-API_BASE: Final = "https://api.helioviewer.org/v2/"
+# Both can be pointed elsewhere from the environment, e.g. at sun_viewer_bench.py's stand-in
+CACHE_DIR: Final = Path(os.environ.get('SUN_VIEWER_CACHE', "/tmp/sun_viewer_cache"))
+API_BASE: Final = os.environ.get('SUN_VIEWER_API', "https://api.helioviewer.org/v2/")
+JPEG_MAGIC: Final = b'\xff\xd8'  # Start-of-image marker
+PNG_MAGIC: Final = b'\x89PNG'
 DEFAULT_FPS: Final = 2
+IDLE_WAIT: Final = 0.1  # Seconds the render loop sleeps when nothing is due
+ANIMATION_STEP: Final = 1 / 60
+FADE_PER_SECOND: Final = 300  # Message alpha lost per second
 DEFAULT_BUFFER_SIZE: Final = 60
-POLL_INTERVAL: Final = 60
+POLL_INTERVAL: Final = 60  # Live poll spacing until a source's cadence is known
+POLL_MIN: Final = 30
+POLL_MAX: Final = 30 * 60
+POLL_MARGIN: Final = 10  # Seconds past an image's expected arrival before polling for it
+POLL_BACKOFF_BASE: Final = 5
+POLL_BACKOFF_MAX: Final = 10 * 60
+CADENCE_SAMPLES: Final = 16
 WINDOW_SIZE: Final = (1024, 1024)
+RESOLUTION_TIERS: Final = (512, 1024, 2048, 4096)  # Download widths; 4096 is native for AIA
+DEFAULT_TIER: Final = 1024
+DEFAULT_MEMORY_BUDGET_MB: Final = 512
+DECODE_AHEAD: Final = 8  # Frames decoded ahead of the playback index
+MIN_DECODED_FRAMES: Final = 2
+RETAIN_HOURS: Final = 24  # Buffered frames older than this are dropped from memory
+RETAIN_MAX_FRAMES: Final = 300  # Buffered frames kept per source at most
+RELEASE_IDLE_AFTER: Final = 10 * 60  # Seconds before a source cycled away from is released
+RETENTION_INTERVAL: Final = 30  # Seconds between retention passes
+SLOT_MINUTES: Final = 12  # Spacing of prefetched frames
+TIMELINE_BATCH: Final = 16  # Staged frames that force a timeline publish
+TIMELINE_PUBLISH_INTERVAL: Final = 0.25  # Seconds a staged frame waits at most, given further inserts
+DECODE_WORKERS: Final = (os.cpu_count() or 1) - 1  # The main process keeps one core
+PREFETCH_WORKERS: Final = 8  # Concurrent metadata lookups during prefetch
+PREFETCH_DOWNLOADS: Final = 4  # Concurrent image downloads during prefetch
+WARM_NEIGHBOURS: Final = 1  # Sources warmed on each side of the current one
+WARM_BUDGET_MB: Final = 128  # Compressed frames held for warmed sources, all together
+WARM_WORKERS: Final = 2  # Concurrent metadata lookups while warming
+WARM_DOWNLOADS: Final = 1  # Concurrent image downloads while warming
+GRID_SIZE: Final = 4  # Tiles in the default grid: the current source and the ones after it
+EXPORT_LOOKAHEAD: Final = PREFETCH_WORKERS  # Export slots resolved and fetched ahead of the encoder
+EXPORT_FPS: Final = 24
+METRICS_WINDOW: Final = 256  # Recent samples each timing is summarised over
+METRICS_LOG_INTERVAL: Final = 60  # Seconds between lines of the metrics log
+TILE_SIZE: Final = 512  # Edge of a Helioviewer tile, in pixels of its level
+TILE_WORKERS: Final = 4  # Concurrent tile downloads
+TILE_SURFACES: Final = 64  # Decoded tiles kept in memory, about 0.75 MB each
+TILE_CACHE_MB: Final = 256  # Tiles kept on disk, evicted least recently used first
+MAX_ZOOM: Final = 16
+PAN_STEP: Final = 0.25  # Fraction of the window one pan key press moves the view
+SERVE_PORT: Final = 8470
+SERVE_POLL: Final = 0.5  # Seconds between checks for a new frame, per live stream
+SERVE_CLIENT_TIMEOUT: Final = 30  # Seconds a stalled client may block its stream before it is dropped
+MJPEG_BOUNDARY: Final = b'sunframe'
+DIFFERENCE_BUDGET_SHARE: Final = 0.25  # Of the memory budget, for luma planes and differences while shown
+DIFFERENCE_GAIN: Final = 4  # Contrast: grey levels per unit of intensity change
+DIFFERENCE_GAIN_MAX: Final = 32
+HTTP_POOL_SIZE: Final = PREFETCH_WORKERS + 4  # Keep-alive connections, for prefetch plus polling
+RESOLVE_SETTLE_AGE: Final = timedelta(hours=6)  # Older slots can no longer gain a closer image
+RESOLVE_SETTLE_GAP: Final = timedelta(minutes=2)  # A resolution this close to its slot is final
+RESOLVE_TTL: Final = 15 * 60  # Seconds an unsettled slot resolution stays valid
+JOURNAL_COMPACT_SLACK: Final = 1000  # Superseded journal lines tolerated before compacting
+CACHE_MAX_MB: Final = 2048
+CACHE_SOURCE_QUOTA_MB: Final = 512
+CACHE_MAX_DAYS: Final = 7
+CACHE_EVICT_INTERVAL: Final = 600  # Seconds between eviction passes
+CACHE_ORPHAN_GRACE: Final = 3600  # Seconds before an unindexed file counts as orphaned
 
 # Solar observation sources
 SOURCES: Final[dict[str, SourceId]] = {
@@ -58,6 +136,16 @@ SOURCES: Final[dict[str, SourceId]] = {
 
 SOURCE_NAMES: Final = {v: k for k, v in SOURCES.items()}
 
+# Full-resolution (width in pixels, arcseconds per pixel) of each instrument, which fixes
+# the tile levels: level L has 2^L times the native scale
+NATIVE_GEOMETRY: Final[dict[SourceId, tuple[int, float]]] = {
+    **dict.fromkeys((8, 9, 10, 11, 12, 13, 14, 15, 16, 17), (4096, 0.6)),  # AIA
+    18: (4096, 0.504), 19: (4096, 0.504),  # HMI
+    4: (1024, 11.9), 5: (1024, 56.0),  # LASCO C2, C3
+    32: (1024, 3.16),  # SWAP
+}
+DEFAULT_GEOMETRY: Final = (4096, 0.6)
+
 WAVELENGTH_INFO: Final = {
     '304': '304Å - Chromosphere (50,000K)',
     '171': '171Å - Quiet corona (600,000K)',
@@ -84,78 +172,1292 @@ class ImageMetadata:
     source_id: SourceId
 
 
+@dataclass
+class CachePolicy:
+    max_bytes: int = CACHE_MAX_MB * 1024 * 1024
+    source_quota_bytes: int = CACHE_SOURCE_QUOTA_MB * 1024 * 1024
+    max_age: timedelta = timedelta(days=CACHE_MAX_DAYS)
+    tile_max_bytes: int = TILE_CACHE_MB * 1024 * 1024
+
+    def cutoff(self) -> str:
+        """Oldest timestamp still within max_age, in the format Helioviewer dates use."""
+        return (datetime.now(timezone.utc) - self.max_age).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass
+class RetentionPolicy:
+    window: timedelta = timedelta(hours=RETAIN_HOURS)
+    max_frames: int = RETAIN_MAX_FRAMES
+    idle_release: float = RELEASE_IDLE_AFTER
+
+
+class Metrics:
+    """Timings and counters from across the pipeline, recorded by any thread.
+
+    Timings are summarised over their last METRICS_WINDOW samples, so the overlay and
+    the metrics log show how the viewer behaves now rather than since start-up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: dict[str, int] = {}
+        self.samples: dict[str, deque[float]] = {}  # Seconds
+        self.totals: dict[str, int] = {}  # Samples ever recorded per timing
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            if (samples := self.samples.get(name)) is None:
+                samples = self.samples[name] = deque(maxlen=METRICS_WINDOW)
+            samples.append(seconds)
+            self.totals[name] = self.totals.get(name, 0) + 1
+
+    @contextmanager
+    def timed(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mean_ms(self, name: str) -> float | None:
+        with self.lock:
+            samples = self.samples.get(name)
+            return statistics.fmean(samples) * 1000 if samples else None
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            timings = {name: (self.totals[name], sorted(samples)) for name, samples in self.samples.items()}
+        return {
+            'counters': counters,
+            'timings': {
+                name: {
+                    'count': total,
+                    'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+                    'p95_ms': round(samples[int(len(samples) * 0.95)] * 1000, 3),
+                    'max_ms': round(samples[-1] * 1000, 3),
+                }
+                for name, (total, samples) in timings.items()
+            },
+        }
+
+
+class Journal:
+    """Append-only JSON-lines file, rewritten atomically on compaction.
+
+    Appends are O(1). A record cut short by a crash is skipped on replay rather than
+    invalidating the whole file. Processes can share a journal: writes hold an advisory
+    lock on a sidecar file, and tail() picks up what others appended since the last read.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.lock_file = path.with_suffix('.lock').open('a')
+        self.depth = 0  # Nesting of locked() in the thread holding it
+        self.records = 0  # Lines in the file, live or superseded
+        self.inode: int | None = None  # File the offset refers to; compaction replaces it
+        self.offset = 0  # Bytes of it already read
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the journal against other threads and processes. Reentrant."""
+        with self.lock:
+            if not self.depth:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> list[dict]:
+        """Records past the offset, starting over if the file was replaced. Caller holds the lock."""
+        try:
+            f = self.path.open('rb')
+        except FileNotFoundError:
+            self.inode, self.offset = None, 0
+            return []
+        records = []
+        with f:
+            if (inode := os.fstat(f.fileno()).st_ino) != self.inode:
+                self.inode, self.offset, self.records = inode, 0, 0
+            f.seek(self.offset)
+            for line in f:
+                self.records += 1
+                self.offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+        return records
+
+    def replay(self) -> list[dict]:
+        with self.locked():
+            self.inode = None
+            return self._read()
+
+    def tail(self) -> tuple[bool, list[dict]]:
+        """Records appended by other processes since the last read.
+
+        The flag is set when another process compacted the file meanwhile; the records are
+        then the whole new file, to be replayed from scratch.
+        """
+        try:
+            stat = os.stat(self.path)
+            if stat.st_ino == self.inode and stat.st_size == self.offset:
+                return False, []
+        except FileNotFoundError:
+            if self.inode is None:
+                return False, []
+        with self.locked():
+            inode = self.inode
+            records = self._read()
+            return inode is not None and self.inode != inode, records
+
+    def append(self, record: dict):
+        line = json.dumps(record).encode() + b'\n'
+        with self.locked():
+            with self.path.open('a+b') as f:
+                if end := f.seek(0, os.SEEK_END):
+                    f.seek(end - 1)
+                    if f.read(1) != b'\n':
+                        line = b'\n' + line  # Seal off a line torn by a crash
+                f.write(line)
+                inode = os.fstat(f.fileno()).st_ino
+            # Records others appended first are left for tail() to pick up, ours included
+            if end == self.offset and inode == (self.inode or inode):
+                self.inode = inode
+                self.offset = end + len(line)
+                self.records += 1
+
+    def compact(self, records: Iterable[dict]):
+        """Replace the file with just the given records.
+
+        Callers catch up with tail() first, under locked(), or they drop what other
+        processes appended.
+        """
+        with self.locked():
+            tmp = self.path.with_suffix('.tmp')
+            count = 0
+            with tmp.open('w') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            stat = os.stat(self.path)
+            self.inode, self.offset, self.records = stat.st_ino, stat.st_size, count
+
+
 class CacheManager:
+    """JPEG files on disk, one per (source, image, resolution tier), plus their index.
+
+    Several processes can share a cache directory. Files are written atomically, index
+    updates go through the shared journal, and lookups first pick up what other
+    processes have indexed since.
+    """
+
     def __init__(self, cache_dir: Path = CACHE_DIR):
         self.cache_dir = cache_dir
         self.cache_dir.mkdir(exist_ok=True)
         self.metadata_lock = threading.Lock()
-        self.metadata = self._load_metadata()
-    
-    def _load_metadata(self) -> dict:
-        metadata_file = self.cache_dir / "metadata.json"
-        if metadata_file.exists():
+        self.journal = Journal(cache_dir / "index.jsonl")
+        # source_key -> image_id -> {'timestamp', 'cached_at', 'tiers': {tier: size}}
+        self.metadata: dict[str, dict[str, dict]] = {}
+        self.timelines: dict[str, list[tuple[str, str]]] = {}  # Sorted (timestamp, image_id) per source
+        self.listeners: list[Callable[[str, str], None]] = []  # Told (source_key, image_id) on add and evict
+        self.locks_dir = cache_dir / "locks"
+        self.locks_dir.mkdir(exist_ok=True)
+        self.tiles_dir = cache_dir / "tiles"  # Unindexed, with an eviction of their own
+        self.tiles_dir.mkdir(exist_ok=True)
+        with self.metadata_lock, self.journal.locked():
+            self._load_metadata()
+
+    def _apply(self, record: dict):
+        try:
+            if record['op'] == 'add':
+                self._index(str(record['source']), record['id'], record['timestamp'],
+                            record['cached_at'], record.get('tier', DEFAULT_TIER), record.get('size', 0))
+            elif record['op'] == 'del':
+                self._unindex(str(record['source']), record['id'], record.get('tier'))
+        except (KeyError, TypeError):
+            pass
+
+    def _refresh(self):
+        """Apply index records other processes appended since. Caller holds metadata_lock."""
+        reset, records = self.journal.tail()
+        if reset:
+            self.metadata.clear()
+            self.timelines.clear()
+        for record in records:
+            self._apply(record)
+
+    def _load_metadata(self):
+        for record in self.journal.replay():
+            self._apply(record)
+
+        # Migrate the single-document index used by older versions
+        legacy_file = self.cache_dir / "metadata.json"
+        if legacy_file.exists() and not self.journal.records:
             try:
-                return json.loads(metadata_file.read_text())
-            except:
-                return {}
-        return {}
-    
-    def _save_metadata(self):
-        with self.metadata_lock:
-            metadata_file = self.cache_dir / "metadata.json"
-            metadata_file.write_text(json.dumps(self.metadata))
-    
-    def get_path(self, source_id: SourceId, image_id: str) -> Path:
-        return self.cache_dir / f"{source_id}_{image_id}.jpg"
+                legacy = json.loads(legacy_file.read_text())
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable {legacy_file}: {e}")
+                return
+            for source_key, images in legacy.items():
+                for image_id, data in images.items():
+                    self._index(source_key, image_id, data['timestamp'], data.get('cached_at', 0), DEFAULT_TIER, 0)
+            self._compact()
+            legacy_file.unlink()
+        elif self.journal.records > 2 * self._entry_count() + JOURNAL_COMPACT_SLACK:
+            self._compact()
+
+    def _index(self, source_key: str, image_id: str, timestamp: str, cached_at: float, tier: int, size: int):
+        entries = self.metadata.setdefault(source_key, {})
+        if (entry := entries.get(image_id)) is None:
+            entry = entries[image_id] = {'timestamp': timestamp, 'cached_at': cached_at, 'tiers': {}}
+            bisect.insort(self.timelines.setdefault(source_key, []), (timestamp, image_id))
+        entry['tiers'][tier] = size
+        entry['cached_at'] = max(entry['cached_at'], cached_at)
+
+    def _unindex(self, source_key: str, image_id: str, tier: int | None = None):
+        """Drop one tier of an image, or the whole image when tier is None or it was the last."""
+        if (entry := self.metadata.get(source_key, {}).get(image_id)) is None:
+            return
+        if tier is not None:
+            entry['tiers'].pop(tier, None)
+        if tier is None or not entry['tiers']:
+            del self.metadata[source_key][image_id]
+            timeline = self.timelines[source_key]
+            del timeline[bisect.bisect_left(timeline, (entry['timestamp'], image_id))]
+
+    def _entry_count(self) -> int:
+        return sum(len(entry['tiers']) for entries in self.metadata.values() for entry in entries.values())
+
+    def _compact(self):
+        self.journal.compact(
+            {
+                'op': 'add', 'source': int(source_key), 'id': image_id, 'tier': tier, 'size': size,
+                'timestamp': entry['timestamp'], 'cached_at': entry['cached_at'],
+            }
+            for source_key, entries in self.metadata.items()
+            for image_id, entry in entries.items()
+            for tier, size in entry['tiers'].items()
+        )
+
+    def get_path(self, source_id: SourceId, image_id: str, tier: int = DEFAULT_TIER) -> Path:
+        # The default tier keeps the name used before tiers existed
+        suffix = '' if tier == DEFAULT_TIER else f"_{tier}"
+        return self.cache_dir / f"{source_id}_{image_id}{suffix}.jpg"
     
-    def save(self, source_id: SourceId, image_id: str, image: Image.Image, timestamp: str):
+    @contextmanager
+    def claim(self, source_id: SourceId, image_id: str, tier: int = DEFAULT_TIER) -> Iterator[None]:
+        """Hold an image while fetching it, so other threads and processes wanting it wait
+        for this copy instead of downloading their own."""
+        with (self.locks_dir / f"{source_id}_{image_id}_{tier}.lock").open('a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _write(path: Path, data: bytes):
+        # Write to a temp file and rename, so readers never see a partial image
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix='.part')
         try:
-            path = self.get_path(source_id, image_id)
-            image.save(path, 'JPEG', quality=90)
-            
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def save(self, source_id: SourceId, image_id: str, data: bytes, timestamp: str,
+             tier: int = DEFAULT_TIER) -> bytes | None:
+        """Write the downloaded JPEG bytes to disk untouched. Returns them, or None on failure."""
+        try:
+            self._write(self.get_path(source_id, image_id, tier), data)
+            cached_at = time.time()
             with self.metadata_lock:
-                key = str(source_id)
-                if key not in self.metadata:
-                    self.metadata[key] = {}
-                self.metadata[key][image_id] = {
-                    'timestamp': timestamp,
-                    'cached_at': time.time()
-                }
-            self._save_metadata()
+                self._index(str(source_id), image_id, timestamp, cached_at, tier, len(data))
+                self.journal.append({
+                    'op': 'add', 'source': source_id, 'id': image_id, 'tier': tier,
+                    'size': len(data), 'timestamp': timestamp, 'cached_at': cached_at,
+                })
+            for listener in self.listeners:
+                listener(str(source_id), image_id)
+            return data
         except Exception:
-            pass
+            return None
     
-    def load(self, source_id: SourceId, image_id: str) -> Image.Image | None:
-        path = self.get_path(source_id, image_id)
-        if path.exists():
+    def load(self, source_id: SourceId, image_id: str, tier: int = DEFAULT_TIER) -> bytes | None:
+        path = self.get_path(source_id, image_id, tier)
+        try:
+            return path.read_bytes()
+        except OSError:
+            return None
+
+    def tile_path(self, source_id: SourceId, image_id: str, level: int, x: int, y: int) -> Path:
+        return self.tiles_dir / f"{source_id}_{image_id}_{level}_{x}_{y}.tile"
+
+    def load_tile(self, source_id: SourceId, image_id: str, level: int, x: int, y: int) -> bytes | None:
+        path = self.tile_path(source_id, image_id, level, x, y)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # The mtime doubles as the last use, for eviction
+            return data
+        except OSError:
+            return None
+
+    def save_tile(self, source_id: SourceId, image_id: str, level: int, x: int, y: int, data: bytes) -> bool:
+        try:
+            self._write(self.tile_path(source_id, image_id, level, x, y), data)
+            return True
+        except OSError:
+            return False
+
+    def evict_tiles(self, max_bytes: int) -> tuple[int, int]:
+        """Remove the least recently used tiles until they fit max_bytes.
+
+        Tiles are only ever looked up by name, so they stay out of the index and its
+        journal; the directory listing is all eviction needs. Returns (files removed, bytes freed).
+        """
+        tiles = []
+        for path in self.tiles_dir.iterdir():
             try:
-                return Image.open(path)
-            except:
-                pass
-        return None
-    
-    def is_cached(self, source_id: SourceId, image_id: str) -> bool:
+                stat = path.stat()
+            except OSError:
+                continue
+            tiles.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in tiles)
+        removed = freed = 0
+        for _, size, path in sorted(tiles):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def cached_tier(self, source_id: SourceId, image_id: str, tier: int = DEFAULT_TIER) -> int | None:
+        """Best cached tier to serve a request for `tier`: the smallest at or above it,
+        else the largest below it. None if the image isn't cached at all."""
         with self.metadata_lock:
-            return str(source_id) in self.metadata and image_id in self.metadata[str(source_id)]
+            self._refresh()
+            entry = self.metadata.get(str(source_id), {}).get(image_id)
+            if not entry or not entry['tiers']:
+                return None
+            tiers = sorted(entry['tiers'])
+        return next((t for t in tiers if t >= tier), tiers[-1])
+
+    def is_cached(self, source_id: SourceId, image_id: str, tier: int = DEFAULT_TIER) -> bool:
+        """Whether the image is cached at `tier` or larger."""
+        cached = self.cached_tier(source_id, image_id, tier)
+        return cached is not None and cached >= tier
 
-    def get_all_cached(self, source_id: SourceId) -> list[tuple[str, str]]:
-        """Get all cached images for a source as (image_id, timestamp) sorted by timestamp."""
+    def get_all_cached(self, source_id: SourceId, start: str | None = None,
+                       end: str | None = None) -> list[tuple[str, str]]:
+        """Get cached images for a source as (image_id, timestamp) sorted by timestamp.
+
+        start/end optionally bound the timestamps (inclusive), compared as strings.
+        """
         with self.metadata_lock:
-            source_key = str(source_id)
-            if source_key not in self.metadata:
-                return []
+            self._refresh()
+            timeline = self.timelines.get(str(source_id), [])
+            lo = bisect.bisect_left(timeline, (start,)) if start else 0
+            hi = bisect.bisect_right(timeline, (end, '\uffff')) if end else len(timeline)
+            return [(image_id, timestamp) for timestamp, image_id in timeline[lo:hi]]
+
+    def _forget(self, source_key: str, image_id: str, tier: int):
+        self._unindex(source_key, image_id, tier)
+        self.journal.append({'op': 'del', 'source': int(source_key), 'id': image_id, 'tier': tier})
+        for listener in self.listeners:
+            listener(source_key, image_id)
+
+    def evict(self, policy: CachePolicy) -> tuple[int, int]:
+        """Apply the policy, and drop index entries without a file and files without an entry.
+
+        Images (all their tiers) are removed oldest-first: everything past max_age, then
+        whatever exceeds a source's quota, then whatever exceeds the total cap.
+        Returns (files removed, bytes freed).
+        """
+        on_disk = {path.name: path for pattern in ('*.jpg', '*.part') for path in self.cache_dir.glob(pattern)}
+        cutoff = policy.cutoff()
+        doomed: list[tuple[str, str, int, int]] = []  # (source_key, image_id, tier, size)
+        survivors: list[tuple[str, str, str, dict[int, int]]] = []  # (timestamp, source_key, image_id, tier sizes)
+
+        # Other processes' entries must be known, or their files would look orphaned
+        with self.metadata_lock, self.journal.locked():
+            self._refresh()
+            for source_key, timeline in self.timelines.items():
+                expired = bisect.bisect_left(timeline, (cutoff,))
+                used = 0
+                for i, (timestamp, image_id) in enumerate(reversed(timeline)):
+                    present: dict[int, int] = {}
+                    for tier, size in self.metadata[source_key][image_id]['tiers'].items():
+                        path = self.get_path(int(source_key), image_id, tier)
+                        if path.name in on_disk or path.exists():
+                            present[tier] = size or path.stat().st_size
+                        else:
+                            doomed.append((source_key, image_id, tier, 0))
+                    if not present:
+                        continue
+                    used += sum(present.values())
+                    if i >= len(timeline) - expired or used > policy.source_quota_bytes:
+                        doomed.extend((source_key, image_id, tier, size) for tier, size in present.items())
+                    else:
+                        survivors.append((timestamp, source_key, image_id, present))
+
+            total = 0
+            for timestamp, source_key, image_id, present in sorted(survivors, reverse=True):
+                total += sum(present.values())
+                if total > policy.max_bytes:
+                    doomed.extend((source_key, image_id, tier, size) for tier, size in present.items())
+
+            for source_key, image_id, tier, _ in doomed:
+                self._forget(source_key, image_id, tier)
+            known = {
+                self.get_path(int(source_key), image_id, tier).name
+                for source_key, entries in self.metadata.items()
+                for image_id, entry in entries.items() for tier in entry['tiers']
+            }
+            if self.journal.records > 2 * self._entry_count() + JOURNAL_COMPACT_SLACK:
+                self._compact()
+
+        removed = [(self.get_path(int(source_key), image_id, tier), size) for source_key, image_id, tier, size in doomed]
+
+        # Files never indexed (killed between write and index append); the grace period
+        # keeps saves that are still in progress
+        grace_cutoff = time.time() - CACHE_ORPHAN_GRACE
+        for name, path in on_disk.items():
+            try:
+                if name not in known and path.stat().st_mtime < grace_cutoff:
+                    removed.append((path, path.stat().st_size))
+            except OSError:
+                continue
+
+        for path, _ in removed:
+            path.unlink(missing_ok=True)
+        for path in self.locks_dir.glob('*.lock'):
+            try:
+                if path.stat().st_mtime < grace_cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+        return len(removed), sum(size for _, size in removed)
+
+
+def _parse_date(value: str) -> datetime | None:
+    """Parse a Helioviewer date ('2024-01-01 12:00:07' or ISO with Z) as UTC."""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class ResolutionCache:
+    """Persistent (source, slot time) -> closest image lookups, as an append-only JSON-lines file.
+
+    A resolution is final once it lands within RESOLVE_SETTLE_GAP of its slot or the slot is
+    older than RESOLVE_SETTLE_AGE; anything else may still gain a closer image and expires
+    after RESOLVE_TTL seconds. The last line for a slot wins. Slots past the cache's max
+    age are dropped by evict(), as their images are gone from the cache by then.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        cache_dir.mkdir(exist_ok=True)
+        self.lock = threading.Lock()
+        self.journal = Journal(cache_dir / "resolved.jsonl")
+        self.entries: dict[tuple[SourceId, str], dict] = {}
+
+        with self.journal.locked():
+            self._apply(self.journal.replay())
+            if self.journal.records > 2 * len(self.entries) + JOURNAL_COMPACT_SLACK:
+                self.journal.compact(self.entries.values())
+
+    def _apply(self, entries: Iterable[dict]):
+        for entry in entries:
+            try:
+                self.entries[(entry['source'], entry['slot'])] = entry
+            except KeyError:
+                continue
+
+    @staticmethod
+    def _slot_key(slot: datetime) -> str:
+        return slot.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def _refresh(self):
+        """Pick up slots other processes resolved since. Caller holds the lock."""
+        reset, records = self.journal.tail()
+        if reset:
+            self.entries.clear()  # Another process compacted, maybe dropping expired slots
+        self._apply(records)
+
+    def get(self, source_id: SourceId, slot: datetime) -> dict | None:
+        with self.lock:
+            self._refresh()
+            entry = self.entries.get((source_id, self._slot_key(slot)))
+        if entry is None:
+            return None
+        if not entry['settled'] and slot < datetime.now(timezone.utc) - RESOLVE_SETTLE_AGE:
+            entry['settled'] = True
+        if not entry['settled'] and time.time() - entry['at'] > RESOLVE_TTL:
+            return None
+        return {'id': entry['id'], 'date': entry['date']}
+
+    def put(self, source_id: SourceId, slot: datetime, data: dict):
+        date = _parse_date(data.get('date', ''))
+        entry = {
+            'source': source_id,
+            'slot': self._slot_key(slot),
+            'id': data['id'],
+            'date': data.get('date', 'Unknown'),
+            'at': time.time(),
+            'settled': date is not None and abs(date - slot) <= RESOLVE_SETTLE_GAP,
+        }
+        with self.lock:
+            self.entries[(source_id, entry['slot'])] = entry
+            self.journal.append(entry)
+
+    def evict(self, max_age: timedelta) -> int:
+        """Drop slots older than max_age, compacting once they make up most of the file.
+        Returns the number dropped."""
+        cutoff = self._slot_key(datetime.now(timezone.utc) - max_age)
+        with self.lock, self.journal.locked():
+            self._refresh()
+            expired = [key for key in self.entries if key[1] < cutoff]
+            for key in expired:
+                del self.entries[key]
+            if self.journal.records > 2 * len(self.entries) + JOURNAL_COMPACT_SLACK:
+                self.journal.compact(list(self.entries.values()))
+        return len(expired)
+
+
+def pick_tier(window_size: tuple[int, int]) -> int:
+    """Smallest resolution tier covering the disk at this window size (it's fit to the short edge)."""
+    edge = min(window_size)
+    return next((tier for tier in RESOLUTION_TIERS if tier >= edge), RESOLUTION_TIERS[-1])
+
 
-            items = [
-                (image_id, data['timestamp'])
-                for image_id, data in self.metadata[source_key].items()
-            ]
-            return sorted(items, key=lambda x: x[1])
+def _fit(size: tuple[int, int], edge: int) -> tuple[int, int]:
+    scale = min(edge / size[0], edge / size[1])
+    return max(1, int(size[0] * scale)), max(1, int(size[1] * scale))
+
+
+def _decode_jpeg(data: bytes, edge: int | None = None, mode: str = 'RGB') -> tuple[tuple[int, int], bytes]:
+    """Decode JPEG bytes to packed row-major RGB, the layout pygame.image.frombuffer takes.
+
+    With an edge, the image comes out already fit to an edge x edge box. Downscales use
+    JPEG draft mode, which decodes at 1/2, 1/4 or 1/8 scale in the DCT domain, so the
+    remaining resize works on a small image. Mode 'L' gives 8-bit luma instead, straight
+    from the JPEG's Y channel. Module-level so pool workers can unpickle it.
+    """
+    image = Image.open(BytesIO(data))
+    if edge:
+        size = _fit(image.size, edge)
+        if size[0] < image.width:
+            image.draft(mode, size)
+        if image.mode != mode:
+            image = image.convert(mode)
+        if image.size != size:
+            image = image.resize(size, Image.Resampling.BILINEAR)
+    elif image.mode != mode:
+        image = image.convert(mode)
+    return image.size, image.tobytes()
+
+
+class DecodePool:
+    """JPEG decoding for bulk work on a process pool, so it scales with cores instead of the GIL.
+
+    Workers hand back pixel buffers that pygame wraps as-is; there is no transpose copy.
+    Single on-demand decodes stay in the calling thread to skip the IPC round trip.
+    """
+
+    def __init__(self, workers: int = DECODE_WORKERS):
+        self.workers = workers
+        os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'  # Workers re-import this script
+        # spawn, since forking a process that runs threads and SDL is unsafe
+        self.pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn')
+        ) if workers > 0 else None
+
+    @staticmethod
+    def wrap(decoded: tuple[tuple[int, int], bytes]) -> pygame.Surface:
+        size, pixels = decoded
+        return pygame.image.frombuffer(pixels, size, 'RGB')
+
+    def decode_pixels(self, frames: list[bytes], edge: int | None = None,
+                      mode: str = 'RGB') -> list[tuple[tuple[int, int], bytes]]:
+        """Decode frames to (size, pixels), for wrap() or for callers that keep the pixels."""
+        if self.pool is None or len(frames) < 2:
+            return [_decode_jpeg(data, edge, mode) for data in frames]
+        try:
+            return list(self.pool.map(_decode_jpeg, frames, [edge] * len(frames), [mode] * len(frames)))
+        except BrokenProcessPool:
+            print("Decode pool died, decoding in-process from now on")
+            self.pool = None
+            return [_decode_jpeg(data, edge, mode) for data in frames]
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PixelFile:
+    """Decoded frames of one source at one edge: fixed-size records in a mapped file.
+
+    Each record has room for a frame fit to an edge x edge box. The journal next to the
+    file maps image ids to records, with the timestamp that decides which record is
+    reused when the file is full. A process holds the file exclusively while it is open;
+    opening one in use elsewhere raises BlockingIOError.
+    """
+
+    def __init__(self, base: Path, edge: int, slots: int):
+        self.record = edge * edge * 3
+        self.slots = slots
+        self.journal = Journal(base.with_suffix('.jsonl'))
+        self.entries: dict[str, dict] = {}  # image_id -> {'slot', 'timestamp', 'size', 'nbytes'}
+        self.owners: dict[int, str] = {}  # slot -> image_id
+        self.pinned: dict[str, int] = {}  # Records wrapped by live surfaces, never reused
+
+        self.fd = os.open(base.with_suffix('.rgb'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if os.fstat(self.fd).st_size != self.record * slots:
+                # Another slot count means another layout; start over
+                os.ftruncate(self.fd, self.record * slots)
+                self.journal.compact([])
+            self.map = mmap.mmap(self.fd, self.record * slots)
+        except BaseException:
+            os.close(self.fd)
+            raise
+
+        for record in self.journal.replay():
+            try:
+                if record['op'] == 'put' and 0 <= record['slot'] < slots:
+                    self._put(record['id'], {key: record[key] for key in ('slot', 'timestamp', 'size', 'nbytes')})
+                elif record['op'] == 'drop':
+                    self._drop(record['id'])
+            except (KeyError, TypeError):
+                continue
+        if self.journal.records > 2 * len(self.entries) + JOURNAL_COMPACT_SLACK:
+            self.journal.compact({'op': 'put', 'id': image_id, **entry} for image_id, entry in self.entries.items())
+
+    def release(self):
+        """Let other processes have the file; the mapping stays valid for surfaces wrapping it."""
+        os.close(self.fd)
+        self.journal.lock_file.close()
+
+    def _put(self, image_id: str, entry: dict):
+        self._drop(image_id)
+        if (previous := self.owners.get(entry['slot'])) is not None:
+            del self.entries[previous]
+        self.entries[image_id] = entry
+        self.owners[entry['slot']] = image_id
+
+    def _drop(self, image_id: str):
+        if (entry := self.entries.pop(image_id, None)) is not None:
+            del self.owners[entry['slot']]
+
+    def claim(self, timestamp: str) -> int | None:
+        """A record to write a frame into: a free one, else the one holding the oldest frame
+        if that is older than this one. None if every candidate is pinned or newer."""
+        pinned = set(self.pinned.values())
+        if (free := next((slot for slot in range(self.slots) if slot not in self.owners and slot not in pinned), None)) is not None:
+            return free
+        victims = [entry for entry in self.entries.values() if entry['slot'] not in pinned]
+        if not victims or (oldest := min(victims, key=lambda e: e['timestamp']))['timestamp'] >= timestamp:
+            return None
+        return oldest['slot']
+
+    def put(self, image_id: str, entry: dict):
+        self._put(image_id, entry)
+        self.journal.append({'op': 'put', 'id': image_id, **entry})
+
+    def drop(self, image_id: str):
+        if image_id in self.entries:
+            self._drop(image_id)
+            self.journal.append({'op': 'drop', 'id': image_id})
+
+
+class PixelStore:
+    """Decoded frames on disk at the display edge, so a restart maps them instead of decoding.
+
+    Frames are wrapped straight from the mapping, without a copy. Records are matched to the
+    JPEG they came from by its length, so a sharper tier is never shown from a stale record;
+    the cache also invalidates them as it adds and evicts images. Only the current edge is
+    kept per source, since a resize makes every other record useless.
+    """
+
+    def __init__(self, directory: Path, slots: int):
+        self.directory = directory
+        self.directory.mkdir(exist_ok=True)
+        self.slots = slots
+        self.lock = threading.Lock()
+        self.files: dict[tuple[str, int], PixelFile | None] = {}  # (source_key, edge); None if in use elsewhere
+
+    def _file(self, source_key: str, edge: int) -> PixelFile | None:
+        if (source_key, edge) not in self.files:
+            for key in [key for key in self.files if key[0] == source_key]:
+                if (old := self.files.pop(key)) is not None:
+                    old.release()
+            try:
+                self.files[source_key, edge] = PixelFile(self.directory / f"{source_key}_{edge}", edge, self.slots)
+            except BlockingIOError:
+                print(f"Decoded frames of source {source_key} are in use by another process, not storing them")
+                self.files[source_key, edge] = None
+            else:
+                self._prune(source_key, edge)
+        return self.files[source_key, edge]
+
+    def _prune(self, source_key: str, edge: int):
+        """Delete a source's files for other edges, unless another process has them open."""
+        for path in self.directory.glob(f"{source_key}_*.rgb"):
+            if path.stem == f"{source_key}_{edge}":
+                continue
+            try:
+                with path.open('r+b') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    for suffix in ('.rgb', '.jsonl', '.lock', '.tmp'):
+                        path.with_suffix(suffix).unlink(missing_ok=True)
+            except OSError:
+                continue
+
+    def load(self, source_id: SourceId, frame: Frame, edge: int) -> pygame.Surface | None:
+        data, _, image_id = frame
+        with self.lock:
+            if (file := self._file(str(source_id), edge)) is None:
+                return None
+            if (entry := file.entries.get(image_id)) is None or entry['nbytes'] != len(data):
+                return None
+            file.pinned[image_id] = entry['slot']
+            size = tuple(entry['size'])
+            offset = entry['slot'] * file.record
+            pixels = memoryview(file.map)[offset:offset + size[0] * size[1] * 3]
+        return pygame.image.frombuffer(pixels, size, 'RGB')
+
+    def save(self, source_id: SourceId, frame: Frame, edge: int, decoded: tuple[tuple[int, int], bytes]):
+        data, timestamp, image_id = frame
+        size, pixels = decoded
+        with self.lock:
+            if (file := self._file(str(source_id), edge)) is None:
+                return
+            if image_id in file.pinned or len(pixels) > file.record:
+                return
+            file.drop(image_id)
+            if (slot := file.claim(timestamp)) is None:
+                return
+            offset = slot * file.record
+            file.map[offset:offset + len(pixels)] = pixels
+            file.put(image_id, {'slot': slot, 'timestamp': timestamp, 'size': list(size), 'nbytes': len(data)})
+
+    def unpin(self, source_id: SourceId, image_id: str):
+        """Let an image's record be reused, once no surface wraps it any more."""
+        with self.lock:
+            for (source_key, _), file in self.files.items():
+                if file and source_key == str(source_id):
+                    file.pinned.pop(image_id, None)
+
+    def invalidate(self, source_key: str, image_id: str):
+        """Drop an image's records; the cache calls this whenever it adds or evicts one."""
+        with self.lock:
+            for (key, _), file in self.files.items():
+                if file and key == source_key:
+                    file.drop(image_id)
+
+
+class FrameStore:
+    """Decoded surfaces for compressed frames, in an LRU bounded by a memory budget.
+
+    Buffers only hold JPEG bytes. Surfaces are decoded on demand, already fit to the
+    display edge, so drawing one is a plain blit. The background worker decodes on the
+    decode pool: first the few frames ahead of the playback index, then the prebuild
+    backlog, which after a resize covers as much of the loop as the budget allows. With a
+    pixel store, frames decoded by an earlier run are mapped from disk instead.
+    """
+
+    def __init__(self, decoder: DecodePool, budget_bytes: int, edge: int, pixels: PixelStore | None = None,
+                 metrics: Metrics | None = None):
+        self.decoder = decoder
+        self.pixels = pixels
+        self.metrics = metrics or Metrics()
+        self.budget_bytes = budget_bytes
+        self.edge = edge  # Short side of the window; surfaces are decoded to fit it
+        self.encoded_bytes = 0
+        self.frame_bytes = 0  # Size of the last decoded surface
+        self.lock = threading.Lock()
+        self.surfaces: OrderedDict[tuple[str, int], pygame.Surface] = OrderedDict()  # (image_id, edge)
+        self.ahead: deque[tuple[SourceId, Frame]] = deque()
+        self.backlog: deque[tuple[SourceId, Frame]] = deque()
+        self.wakeup = threading.Event()
+        threading.Thread(target=self._decode_worker, daemon=True).start()
+
+    @property
+    def decoded_bytes(self) -> int:
+        return len(self.surfaces) * self.frame_bytes
+
+    def capacity(self) -> int:
+        """Number of decoded frames that fit next to the compressed frames."""
+        if not self.frame_bytes:
+            return MIN_DECODED_FRAMES
+        return max(MIN_DECODED_FRAMES, (self.budget_bytes - self.encoded_bytes) // self.frame_bytes)
+
+    def track(self, data: bytes):
+        with self.lock:
+            self.encoded_bytes += len(data)
+
+    def untrack(self, data: bytes):
+        with self.lock:
+            self.encoded_bytes -= len(data)
+
+    def discard(self, source_id: SourceId, image_id: str):
+        """Forget decoded surfaces of an image, e.g. when a higher tier replaces its bytes."""
+        with self.lock:
+            for key in [key for key in self.surfaces if key[0] == image_id]:
+                del self.surfaces[key]
+        if self.pixels:
+            self.pixels.unpin(source_id, image_id)
+
+    def forget(self, source_id: SourceId, frames: Iterable[Frame]):
+        """Drop frames evicted from the buffers: their bytes, surfaces and queued decodes."""
+        with self.lock:
+            gone = set()
+            for data, _, image_id in frames:
+                self.encoded_bytes -= len(data)
+                gone.add(image_id)
+            for key in [key for key in self.surfaces if key[0] in gone]:
+                del self.surfaces[key]
+            self.ahead = deque(item for item in self.ahead if item[1][2] not in gone)
+            self.backlog = deque(item for item in self.backlog if item[1][2] not in gone)
+        if self.pixels:
+            for image_id in gone:
+                self.pixels.unpin(source_id, image_id)
+
+    def get(self, source_id: SourceId, frame: Frame) -> pygame.Surface:
+        key = (frame[2], self.edge)
+        with self.lock:
+            if (surface := self.surfaces.get(key)) is not None:
+                self.surfaces.move_to_end(key)
+                return surface
+        surface, = self._surfaces([(source_id, frame)], key[1])
+        self._put(key, surface)
+        return surface
+
+    def set_budget(self, budget_bytes: int):
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            capacity = self.capacity()
+            while len(self.surfaces) > capacity:
+                self.surfaces.popitem(last=False)
+
+    def set_edge(self, edge: int):
+        """Switch to a new display edge, dropping surfaces decoded for the old one."""
+        with self.lock:
+            if edge == self.edge:
+                return
+            self.edge = edge
+            self.surfaces.clear()
+            self.ahead.clear()
+            self.backlog.clear()
+
+    def decode_ahead(self, items: Iterable[tuple[SourceId, Frame]]):
+        """Replace the high-priority queue with the given upcoming frames."""
+        with self.lock:
+            limit = self.capacity() - 1
+            self.ahead = deque(
+                (source_id, frame) for source_id, frame in list(items)[:limit]
+                if (frame[2], self.edge) not in self.surfaces
+            )
+        self.wakeup.set()
+
+    def prebuild(self, items: Iterable[tuple[SourceId, Frame]]):
+        """Queue a loop, in playback order, for background decoding at the current edge.
+
+        Only what fits the budget is queued: decoding more would evict the frames due
+        soonest before they are shown.
+        """
+        with self.lock:
+            limit = self.capacity() - 1
+            self.backlog = deque(
+                (source_id, frame) for source_id, frame in list(items)[:limit]
+                if (frame[2], self.edge) not in self.surfaces
+            )
+        self.wakeup.set()
+
+    def _surfaces(self, items: list[tuple[SourceId, Frame]], edge: int) -> list[pygame.Surface]:
+        """Surfaces for frames, mapped from the pixel store where it has them, else decoded."""
+        surfaces = [self.pixels.load(source_id, frame, edge) if self.pixels else None for source_id, frame in items]
+        self.metrics.count('pixel_store_hits', len(items) - surfaces.count(None))
+        if missing := [i for i, surface in enumerate(surfaces) if surface is None]:
+            started = time.perf_counter()
+            decoded = self.decoder.decode_pixels([items[i][1][0] for i in missing], edge)
+            # A batch decodes in parallel; charge each frame its share of the wall time
+            for _ in missing:
+                self.metrics.record('decode', (time.perf_counter() - started) / len(missing))
+            for i, pixels in zip(missing, decoded):
+                if self.pixels:
+                    self.pixels.save(*items[i], edge, pixels)
+                surfaces[i] = DecodePool.wrap(pixels)
+        return surfaces
+
+    def _put(self, key: tuple[str, int], surface: pygame.Surface):
+        with self.lock:
+            self.frame_bytes = surface.get_bytesize() * surface.get_width() * surface.get_height()
+            self.surfaces[key] = surface
+            self.surfaces.move_to_end(key)
+            capacity = self.capacity()
+            while len(self.surfaces) > capacity:
+                self.surfaces.popitem(last=False)
+
+    def _decode_worker(self):
+        while True:
+            self.wakeup.wait()
+            with self.lock:
+                if not self.ahead and not self.backlog:
+                    self.wakeup.clear()
+                    continue
+                edge = self.edge
+                batch = []
+                while (queue := self.ahead or self.backlog) and len(batch) < max(1, self.decoder.workers):
+                    source_id, frame = queue.popleft()
+                    if (frame[2], edge) not in self.surfaces:
+                        batch.append((source_id, frame))
+            try:
+                surfaces = self._surfaces(batch, edge)
+            except Exception:
+                continue
+            for (_, frame), surface in zip(batch, surfaces):
+                # Skip results for an edge that was switched away from meanwhile
+                if edge == self.edge:
+                    self._put((frame[2], edge), surface)
+
+
+class DifferenceStore:
+    """Running- and base-difference frames, cached as surfaces like the normal ones.
+
+    Each frame is decoded once to 8-bit luma at the display edge. A difference is then
+    one int16 subtraction and a lookup in a contrast LUT of packed pixels, so
+    playback, like normal video mode, is a cache hit on a surface computed ahead of it.
+    A difference is keyed by its reference frame too: when an insert or a trim changes
+    a frame's reference, the stale result is never looked up again and ages out.
+    """
+
+    def __init__(self, decoder: DecodePool, budget_bytes: int, edge: int, metrics: Metrics | None = None):
+        self.decoder = decoder
+        self.budget_bytes = budget_bytes
+        self.edge = edge
+        self.metrics = metrics or Metrics()
+        self.gain = DIFFERENCE_GAIN
+        self.lut = self._lut(self.gain)
+        self.lock = threading.Lock()
+        self.luma: OrderedDict[str, np.ndarray] = OrderedDict()  # image_id -> edge-fit luma plane
+        self.surfaces: OrderedDict[tuple[str, str], pygame.Surface] = OrderedDict()  # (image_id, reference_id)
+        self.queue: deque[tuple[Frame, Frame]] = deque()
+        self.wakeup = threading.Event()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    @staticmethod
+    def _lut(gain: float) -> np.ndarray:
+        """A pixel for every difference from -255 to 255: mid grey for none, brighter or darker with change.
+
+        Pixels are packed RGBX in a uint32, so the lookup gathers one word per pixel
+        rather than three bytes, which is several times faster.
+        """
+        grey = np.clip(128 + np.arange(-255, 256) * gain, 0, 255).astype(np.uint32)
+        return grey | grey << 8 | grey << 16 | np.uint32(0xff) << 24
+
+    def capacity(self) -> int:
+        """Frames that fit the budget, counting a luma plane and an RGBX surface for each."""
+        return max(MIN_DECODED_FRAMES, self.budget_bytes // (5 * self.edge * self.edge))
+
+    def set_edge(self, edge: int):
+        with self.lock:
+            if edge != self.edge:
+                self.edge = edge
+                self.luma.clear()
+                self.surfaces.clear()
+                self.queue.clear()
+
+    def set_budget(self, budget_bytes: int):
+        """Resize the budget; none, while differences aren't shown, empties the store."""
+        with self.lock:
+            self.budget_bytes = budget_bytes
+            if not budget_bytes:
+                self.luma.clear()
+                self.surfaces.clear()
+                self.queue.clear()
+            while len(self.luma) > self.capacity():
+                self.luma.popitem(last=False)
+            while len(self.surfaces) > self.capacity():
+                self.surfaces.popitem(last=False)
+
+    def set_gain(self, gain: float):
+        """Change the contrast; only the surfaces are recomputed, the luma planes stay."""
+        with self.lock:
+            self.gain = gain
+            self.lut = self._lut(gain)
+            self.surfaces.clear()
+
+    def get(self, frame: Frame, reference: Frame) -> pygame.Surface | None:
+        """The difference of frame minus reference, or None if their sizes don't match."""
+        key = (frame[2], reference[2])
+        with self.lock:
+            if (surface := self.surfaces.get(key)) is not None:
+                self.surfaces.move_to_end(key)
+                return surface
+        return self._compute(frame, reference)
+
+    def ahead(self, pairs: Iterable[tuple[Frame, Frame]]):
+        """Replace the queue with the (frame, reference) pairs about to be shown."""
+        with self.lock:
+            self.queue = deque(pair for pair in pairs if (pair[0][2], pair[1][2]) not in self.surfaces)
+        self.wakeup.set()
+
+    def added(self, pairs: Iterable[tuple[Frame, Frame]]):
+        """Queue the differences a newly arrived frame creates or changes."""
+        with self.lock:
+            self.queue.extend(pairs)
+        self.wakeup.set()
+
+    def _planes(self, frames: list[Frame], edge: int) -> list[np.ndarray]:
+        with self.lock:
+            planes = [self.luma.get(frame[2]) for frame in frames]
+        if missing := [i for i, plane in enumerate(planes) if plane is None]:
+            decoded = self.decoder.decode_pixels([frames[i][0] for i in missing], edge, 'L')
+            with self.lock:
+                for i, ((width, height), pixels) in zip(missing, decoded):
+                    planes[i] = np.frombuffer(pixels, np.uint8).reshape(height, width)
+                    if edge == self.edge:
+                        self.luma[frames[i][2]] = planes[i]
+                while len(self.luma) > self.capacity():
+                    self.luma.popitem(last=False)
+        return planes
+
+    def _compute(self, frame: Frame, reference: Frame) -> pygame.Surface | None:
+        started = time.perf_counter()
+        edge = self.edge
+        current, base = self._planes([frame, reference], edge)
+        if current.shape != base.shape:
+            return None
+        lut = self.lut
+        difference = np.subtract(current, base, dtype=np.int16)
+        difference += 255
+        pixels = np.take(lut, difference)  # Contiguous, so pygame can wrap it as-is
+        height, width = current.shape
+        surface = pygame.image.frombuffer(pixels, (width, height), 'RGBX')
+        with self.lock:
+            # Results for a switched-away edge or contrast are handed out but not kept
+            if edge == self.edge and lut is self.lut:
+                self.surfaces[(frame[2], reference[2])] = surface
+                while len(self.surfaces) > self.capacity():
+                    self.surfaces.popitem(last=False)
+        self.metrics.record('difference', time.perf_counter() - started)
+        return surface
+
+    def _worker(self):
+        while True:
+            self.wakeup.wait()
+            with self.lock:
+                if not self.queue:
+                    self.wakeup.clear()
+                    continue
+                frame, reference = self.queue.popleft()
+                if (frame[2], reference[2]) in self.surfaces:
+                    continue
+            try:
+                self._compute(frame, reference)
+            except Exception:
+                continue
+
+
+class CadencePoller:
+    """Schedules live polls for one source from its observed image cadence.
+
+    The cadence is the smallest gap between recently seen image timestamps (gaps between
+    polled images are multiples of it), and the next poll lands just after the next image
+    should have shown up in the API. How long images take to show up is estimated from
+    the polls either side of each arrival, so a late poll can't push the estimate, and with
+    it the next poll, later still. Until a cadence is known, or once an expected image
+    is overdue, polls fall back to the fixed interval. Failures back off exponentially
+    with jitter, so a network outage can't turn into a tight loop.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.timestamps: deque[datetime] = deque(maxlen=CADENCE_SAMPLES)
+        self.lags: deque[float] = deque(maxlen=CADENCE_SAMPLES)  # Seconds from an image's date to its arrival
+        self.last_poll_at: float | None = None
+        self.failures = 0
+        self.next_poll_at = 0.0
+        self.stats = {'polls': 0, 'new': 0, 'unchanged': 0, 'errors': 0}
+
+    @property
+    def cadence(self) -> float | None:
+        ordered = sorted(self.timestamps)
+        gaps = [(b - a).total_seconds() for a, b in zip(ordered, ordered[1:])]
+        return min(gaps) if gaps else None
+
+    def observe(self, date: str) -> float:
+        """Record a successful poll that returned an image dated `date`. Returns the delay scheduled."""
+        self.stats['polls'] += 1
+        self.failures = 0
+        now = time.time()
+        seen = _parse_date(date)
+        if seen is not None and seen not in self.timestamps:
+            self.stats['new'] += 1
+            if self.timestamps and seen > max(self.timestamps) and self.last_poll_at is not None:
+                # It arrived between the last poll, which still returned an older image, and
+                # this one. Taking the middle keeps late polls from inflating the estimate.
+                missed = max(0.0, self.last_poll_at - seen.timestamp())
+                self.lags.append((missed + now - seen.timestamp()) / 2)
+            self.timestamps.append(seen)
+        else:
+            self.stats['unchanged'] += 1
+        self.last_poll_at = now
+
+        delay = self.interval
+        if (cadence := self.cadence) is not None:
+            # The lower quartile, so an image that turns up early isn't waited out
+            lag = sorted(self.lags)[len(self.lags) // 4] if self.lags else 0.0
+            expected = max(self.timestamps).timestamp() + cadence + lag
+            if (until := expected + POLL_MARGIN - now) > 0:
+                delay = until
+        return self._schedule(min(max(delay, POLL_MIN), POLL_MAX))
+
+    def failed(self) -> float:
+        """Record a failed poll. Returns the backoff delay scheduled."""
+        self.stats['polls'] += 1
+        self.stats['errors'] += 1
+        self.failures += 1
+        ceiling = min(POLL_BACKOFF_MAX, POLL_BACKOFF_BASE * 2 ** (self.failures - 1))
+        return self._schedule(random.uniform(ceiling / 2, ceiling))
+
+    def _schedule(self, delay: float) -> float:
+        self.next_poll_at = time.time() + delay
+        return delay
+
+    def summary(self) -> str:
+        cadence = f"{c:.0f}s" if (c := self.cadence) is not None else "?"
+        next_in = max(0.0, self.next_poll_at - time.time())
+        return (f"Polls: {self.stats['polls']} | New: {self.stats['new']} | Errors: {self.stats['errors']}"
+                f" | Cadence: {cadence} | Next: {next_in:.0f}s")
+
+
+class Timeline:
+    """Frames of one source in timestamp order, readable without locks.
+
+    Readers take `frames`, an immutable tuple that is replaced wholesale, never mutated,
+    so the render loop gets a consistent view from a single attribute read. Writers stage
+    inserts under the lock and merge them in batches; `tiers` covers staged frames too,
+    so duplicates are caught before they're published.
+    """
+
+    def __init__(self):
+        self.frames: tuple[Frame, ...] = ()
+        self.tiers: dict[str, int] = {}  # image_id -> resolution tier of its bytes
+        self.nbytes = 0  # Compressed size of all frames, staged ones included
+        self.lock = threading.Lock()
+        self.staged: dict[str, Frame] = {}
+        self.published_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def insert(self, data: bytes, timestamp: str, image_id: str, tier: int) -> tuple[bool, bytes | None]:
+        """Stage a frame, or a sharper tier of a known one.
+
+        Returns whether it was taken, and the bytes it replaces if any.
+        """
+        with self.lock:
+            if (have := self.tiers.get(image_id)) is not None and have >= tier:
+                return False, None
+            replaced = None
+            if have is not None:
+                if image_id in self.staged:
+                    replaced = self.staged[image_id][0]
+                else:
+                    start = bisect.bisect_left(self.frames, timestamp, key=lambda f: f[1])
+                    replaced = next((f[0] for f in self.frames[start:] if f[2] == image_id), None)
+            self.tiers[image_id] = tier
+            self.staged[image_id] = (data, timestamp, image_id)
+            self.nbytes += len(data) - (len(replaced) if replaced else 0)
+            if (len(self.staged) >= TIMELINE_BATCH
+                    or time.monotonic() - self.published_at >= TIMELINE_PUBLISH_INTERVAL):
+                self._publish()
+        return True, replaced
+
+    def flush(self):
+        """Publish whatever is staged, at the end of a writer's batch."""
+        with self.lock:
+            if self.staged:
+                self._publish()
+
+    def count_at_tier(self, tier: int) -> int:
+        with self.lock:
+            return sum(1 for have in self.tiers.values() if have >= tier)
+
+    def trim(self, cutoff: str, max_frames: int) -> tuple[Frame, ...]:
+        """Drop frames older than cutoff, then the oldest beyond max_frames. Returns the dropped frames."""
+        with self.lock:
+            if self.staged:
+                self._publish()
+            frames = self.frames
+            start = max(bisect.bisect_left(frames, cutoff, key=lambda f: f[1]), len(frames) - max_frames)
+            if start <= 0:
+                return ()
+            dropped, self.frames = frames[:start], frames[start:]
+            for data, _, image_id in dropped:
+                del self.tiers[image_id]
+                self.nbytes -= len(data)
+            return dropped
+
+    def release(self) -> tuple[Frame, ...]:
+        """Empty the timeline. Returns everything it held, staged frames included."""
+        with self.lock:
+            frames = self.frames + tuple(self.staged.values())
+            self.frames = ()
+            self.staged.clear()
+            self.tiers.clear()
+            self.nbytes = 0
+            return frames
+
+    def _publish(self):
+        kept = [f for f in self.frames if f[2] not in self.staged]
+        added = sorted(self.staged.values(), key=lambda f: f[1])
+        self.frames = tuple(heapq.merge(kept, added, key=lambda f: f[1]))
+        self.staged.clear()
+        self.published_at = time.monotonic()
+
+
+def pooled_session(size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """A session for every thread to share, keeping up to `size` connections alive.
+
+    Connection pools are thread-safe; the session's own state is only cookies, which
+    Helioviewer doesn't set.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class HelioviewerClient:
-    def __init__(self, source_id: SourceId):
+    def __init__(self, source_id: SourceId, resolutions: ResolutionCache | None = None,
+                 session: requests.Session | None = None):
         self.source_id = source_id
-        self.session = requests.Session()
+        self.resolutions = resolutions
+        self.session = session or requests.Session()
     
     def get_closest_image(self, target_time: datetime) -> dict | None:
         params = {
@@ -168,20 +1470,437 @@ class HelioviewerClient:
             return response.json()
         except:
             return None
+
+    def resolve_slot(self, slot: datetime) -> dict | None:
+        """Closest image for a timeline slot, answered from the resolution cache when possible."""
+        if self.resolutions and (data := self.resolutions.get(self.source_id, slot)):
+            return data
+        data = self.get_closest_image(slot)
+        if self.resolutions and data and 'id' in data:
+            self.resolutions.put(self.source_id, slot, data)
+        return data
     
-    def download_image(self, image_id: str, width: int = 1024) -> Image.Image | None:
+    def download_image(self, image_id: str, width: int = DEFAULT_TIER) -> bytes | None:
+        """Fetch the JPEG body as-is; decoding is left to whoever displays it."""
         params = {'id': image_id, 'width': width, 'height': width, 'type': 'jpg'}
         try:
             response = self.session.get(f"{API_BASE}downloadImage/", params=params, timeout=15)
             response.raise_for_status()
-            return Image.open(BytesIO(response.content))
         except:
             return None
+        # Errors can come back as a 200 with a JSON body
+        return response.content if response.content.startswith(JPEG_MAGIC) else None
+
+    def download_tile(self, image_id: str, image_scale: float, x: int, y: int) -> bytes | None:
+        """One TILE_SIZE square of an image rendered at image_scale arcsec/px.
+
+        x and y count tiles from the image centre, which is the corner shared by tiles
+        (-1, -1) and (0, 0).
+        """
+        params = {'id': image_id, 'x': x, 'y': y, 'imageScale': image_scale}
+        try:
+            response = self.session.get(f"{API_BASE}getTile/", params=params, timeout=15)
+            response.raise_for_status()
+        except:
+            return None
+        return response.content if response.content.startswith((JPEG_MAGIC, PNG_MAGIC)) else None
+
+
+class Fetcher:
+    """The way images get from the cache or the network into memory, shared by all threads.
+
+    Concurrent fetches of one image are coalesced into a single download, which every
+    caller then gets. Across processes, the cache's claim does the same.
+    """
+
+    def __init__(self, cache: CacheManager, session: requests.Session | None = None,
+                 metrics: Metrics | None = None):
+        self.cache = cache
+        self.session = session or pooled_session()
+        self.session.hooks['response'].append(self._observe)
+        self.metrics = metrics or Metrics()
+        self.lock = threading.Lock()
+        self.inflight: dict[tuple[SourceId, str, int], Future] = {}
+        self.stats = dict.fromkeys(('hits', 'coalesced', 'downloads', 'failures'), 0)
+
+    def _observe(self, response: requests.Response, *args, **kwargs):
+        """Session hook timing every API lookup, whichever client made it."""
+        if 'getClosestImage' in response.url:
+            self.metrics.record('api', response.elapsed.total_seconds())
+            if not response.ok:
+                self.metrics.count('api_errors')
+
+    def cached(self, source_id: SourceId, image_id: str, tier: int) -> tuple[bytes, int] | None:
+        """Cached bytes of an image at `tier` or sharper, with the tier they have."""
+        have = self.cache.cached_tier(source_id, image_id, tier)
+        if have is None or have < tier or not (frame := self.cache.load(source_id, image_id, have)):
+            return None
+        with self.lock:
+            self.stats['hits'] += 1
+        return frame, have
+
+    def fetch(self, client: HelioviewerClient, source_id: SourceId, image_id: str, timestamp: str,
+              tier: int) -> tuple[bytes, int] | None:
+        """Bytes of an image at `tier` or sharper, from the cache or downloaded into it."""
+        key = (source_id, image_id, tier)
+        with self.lock:
+            if leader := (future := self.inflight.get(key)) is None:
+                future = self.inflight[key] = Future()
+            else:
+                self.stats['coalesced'] += 1
+        if not leader:
+            with self.metrics.timed('fetch_wait'):
+                return future.result()
+
+        result = None
+        try:
+            result = self._fetch(client, source_id, image_id, timestamp, tier)
+        finally:
+            with self.lock:
+                del self.inflight[key]
+            future.set_result(result)
+        return result
+
+    def _fetch(self, client: HelioviewerClient, source_id: SourceId, image_id: str, timestamp: str,
+               tier: int) -> tuple[bytes, int] | None:
+        started = time.perf_counter()
+        with self.cache.claim(source_id, image_id, tier):
+            self.metrics.record('claim_wait', time.perf_counter() - started)
+            if cached := self.cached(source_id, image_id, tier):
+                return cached
+            with self.metrics.timed('download'):
+                frame = client.download_image(image_id, tier)
+            with self.lock:
+                self.stats['downloads' if frame else 'failures'] += 1
+            if not frame:
+                return None
+            self.metrics.count('download_bytes', len(frame))
+            self.cache.save(source_id, image_id, frame, timestamp, tier)
+            return frame, tier
+
+    def hit_ratio(self) -> float | None:
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['downloads']
+            return self.stats['hits'] / lookups if lookups else None
+
+    def summary(self) -> str:
+        return (f"Downloads: {self.stats['downloads']} | Cache hits: {self.stats['hits']}"
+                f" | Coalesced: {self.stats['coalesced']} | Failed: {self.stats['failures']}")
+
+
+class TileView:
+    """Zoom and pan over one image, drawn from the Helioviewer tiles covering the window.
+
+    Positions are in image widths from the image centre. The view uses the coarsest tile
+    level at least as sharp as the screen, so zooming never fetches more pixels than are
+    shown. Until a tile arrives, the full-disk frame is stretched under it. Tiles just
+    past the window in the direction of the last pan are fetched too.
+    """
+
+    def __init__(self, cache: CacheManager, metrics: Metrics | None = None):
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+        self.zoom = 1.0  # Window edge per image width; 1 shows the whole disk
+        self.center = (0.0, 0.0)
+        self.pan = (0, 0)  # Direction of the last pan, in tiles
+        self.lock = threading.Lock()
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()  # (source, image, level, x, y)
+        self.scaled: dict[tuple, pygame.Surface] = {}  # Tiles of the last draw, resized for scaled_for
+        self.scaled_for = 0.0
+        self.wanted: set[tuple] = set()  # Tiles the last draw asked for; others aren't fetched
+        self.pending: set[tuple] = set()
+        self.pool = ThreadPoolExecutor(max_workers=TILE_WORKERS, thread_name_prefix='tile')
+        self.on_tile: Callable[[], None] = lambda: None  # Called from pool threads as tiles arrive
+
+    @property
+    def zoomed(self) -> bool:
+        return self.zoom > 1
+
+    def zoom_by(self, factor: float, anchor: tuple[float, float] = (0.0, 0.0)):
+        """Zoom keeping the point `anchor` (window-relative, in window edges) in place."""
+        zoom = min(MAX_ZOOM, max(1.0, self.zoom * factor))
+        # The point under the anchor stays put: center + anchor / zoom is constant
+        cx = self.center[0] + anchor[0] / self.zoom - anchor[0] / zoom
+        cy = self.center[1] + anchor[1] / self.zoom - anchor[1] / zoom
+        self.zoom = zoom
+        self.center = (0.0, 0.0) if zoom == 1 else self._clamp(cx, cy)
+
+    def pan_by(self, dx: float, dy: float):
+        """Move the view by (dx, dy) window edges."""
+        self.center = self._clamp(self.center[0] + dx / self.zoom, self.center[1] + dy / self.zoom)
+        self.pan = ((dx > 0) - (dx < 0), (dy > 0) - (dy < 0))
+
+    def reset(self):
+        self.zoom = 1.0
+        self.center = (0.0, 0.0)
+        self.pan = (0, 0)
+
+    def _clamp(self, cx: float, cy: float) -> tuple[float, float]:
+        # The view centre stays on the image
+        return max(-0.5, min(0.5, cx)), max(-0.5, min(0.5, cy))
+
+    @staticmethod
+    def level(source_id: SourceId, displayed: float) -> int:
+        """Coarsest level whose image is at least `displayed` pixels wide."""
+        width, _ = NATIVE_GEOMETRY.get(source_id, DEFAULT_GEOMETRY)
+        level = 0
+        while (width >> (level + 1)) >= displayed and (width >> (level + 1)) >= TILE_SIZE:
+            level += 1
+        return level
+
+    def draw(self, screen: pygame.Surface, client: HelioviewerClient, image_id: str, base: pygame.Surface):
+        """Draw the view of an image, asking for the tiles it is missing."""
+        source_id = client.source_id
+        ww, wh = screen.get_size()
+        displayed = min(ww, wh) * self.zoom  # On-screen width of the whole image
+        native_width, native_scale = NATIVE_GEOMETRY.get(source_id, DEFAULT_GEOMETRY)
+        level = self.level(source_id, displayed)
+        width = native_width >> level
+        cu, cv = self.center
+
+        def to_screen(u: float, v: float) -> tuple[int, int]:
+            return round(ww / 2 + (u - cu) * displayed), round(wh / 2 + (v - cv) * displayed)
+
+        # The full-disk frame, stretched, stands in for tiles still on their way
+        bw, bh = base.get_size()
+        u0, v0 = cu - ww / 2 / displayed, cv - wh / 2 / displayed
+        crop = pygame.Rect(math.floor(bw / 2 + u0 * bw), math.floor(bh / 2 + v0 * bw),
+                           math.ceil(ww / displayed * bw) + 1, math.ceil(wh / displayed * bw) + 1).clip(base.get_rect())
+        if crop.width and crop.height:
+            size = (round(crop.width / bw * displayed), round(crop.height / bw * displayed))
+            with self.metrics.timed('scale'):
+                stretched = pygame.transform.scale(base.subsurface(crop), size)
+            screen.blit(stretched, to_screen((crop.x - bw / 2) / bw, (crop.y - bh / 2) / bw))
+
+        if displayed != self.scaled_for:
+            self.scaled.clear()
+            self.scaled_for = displayed
+        # Only tiles on screen keep their resized copy; at high zoom each is many times a tile
+        previous, self.scaled = self.scaled, {}
+        tile_u = TILE_SIZE / width  # A tile's width in image widths
+        half = math.ceil(width / 2 / TILE_SIZE)  # Tiles from the centre to an edge
+        xs = range(max(-half, math.floor(u0 / tile_u)), min(half, math.ceil((cu + ww / 2 / displayed) / tile_u)))
+        ys = range(max(-half, math.floor(v0 / tile_u)), min(half, math.ceil((cv + wh / 2 / displayed) / tile_u)))
+        visible = sorted(((x, y) for x in xs for y in ys),
+                         key=lambda t: abs((t[0] + 0.5) * tile_u - cu) + abs((t[1] + 0.5) * tile_u - cv))
+
+        missing = []
+        for x, y in visible:
+            key = (source_id, image_id, level, x, y)
+            with self.lock:
+                surface = self.surfaces.get(key)
+                if surface is not None:
+                    self.surfaces.move_to_end(key)
+            if surface is None:
+                missing.append(key)
+                continue
+            if (scaled := previous.get(key)) is None:
+                size = (round(surface.get_width() / width * displayed), round(surface.get_height() / width * displayed))
+                with self.metrics.timed('scale'):
+                    scaled = pygame.transform.smoothscale(surface, size)
+            self.scaled[key] = scaled
+            screen.blit(scaled, to_screen(x * tile_u, y * tile_u))
+
+        # One row or column past the window, on the side the view is moving towards
+        ahead = []
+        if self.pan[0] and -half <= (x := xs.stop if self.pan[0] > 0 else xs.start - 1) < half:
+            ahead += [(source_id, image_id, level, x, y) for y in ys]
+        if self.pan[1] and -half <= (y := ys.stop if self.pan[1] > 0 else ys.start - 1) < half:
+            ahead += [(source_id, image_id, level, x, y) for x in xs]
+        with self.lock:
+            self.wanted = set(missing) | set(ahead)
+        for key in missing + ahead:
+            self._request(client, key, native_scale * (1 << level))
+
+    def _request(self, client: HelioviewerClient, key: tuple, image_scale: float):
+        with self.lock:
+            if key in self.pending or key in self.surfaces:
+                return
+            self.pending.add(key)
+        self.pool.submit(self._load, client, key, image_scale)
+
+    def _load(self, client: HelioviewerClient, key: tuple, image_scale: float):
+        try:
+            with self.lock:
+                if key not in self.wanted:
+                    return  # The view moved on before this tile's turn came
+            source_id, image_id, level, x, y = key
+            if (data := self.cache.load_tile(*key)) is not None:
+                self.metrics.count('tile_hits')
+            else:
+                with self.metrics.timed('tile_download'):
+                    data = client.download_tile(image_id, image_scale, x, y)
+                if data is None:
+                    self.metrics.count('tile_failures')
+                    return
+                self.metrics.count('tile_bytes', len(data))
+                self.cache.save_tile(*key, data)
+            surface = DecodePool.wrap(_decode_jpeg(data))
+            with self.lock:
+                self.surfaces[key] = surface
+                while len(self.surfaces) > TILE_SURFACES:
+                    self.surfaces.popitem(last=False)
+            self.on_tile()
+        except Exception as e:
+            print(f"Failed to load tile {key}: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(key)
+
+
+class FeedServer(ThreadingHTTPServer):
+    """Serves a viewer's buffered frames over HTTP, as the JPEG bytes they were downloaded as.
+
+    /live.mjpg pushes each new frame of a source and /video.mjpg loops its timeline, both
+    as multipart MJPEG; /timeline.json lists the timeline and /frame.jpg serves one
+    frame. Streams read the immutable timeline snapshots, so a slow client never holds
+    up the fetch pipeline, and nothing is decoded or re-encoded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], viewer: SunViewer):
+        super().__init__(address, FeedHandler)
+        self.viewer = viewer
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    server: FeedServer
+    timeout = SERVE_CLIENT_TIMEOUT
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        served = self.server.viewer._active_sources()
+        source_id = SOURCES.get(query['source']) if 'source' in query else served[0]
+        routes = {
+            '/': self._index,
+            '/live.mjpg': self._live,
+            '/video.mjpg': self._video,
+            '/timeline.json': self._timeline,
+            '/frame.jpg': self._frame,
+        }
+        if (route := routes.get(url.path)) is None:
+            return self.send_error(404)
+        if source_id not in served:
+            return self.send_error(404, f"Not serving source {query.get('source')}")
+        try:
+            route(source_id, query)
+        except OSError:
+            pass  # The client went away or stalled past the timeout
+
+    def _send(self, body: bytes, content_type: str, cache: str = 'no-cache'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', cache)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _index(self, source_id: SourceId, query: dict):
+        names = [SOURCE_NAMES.get(source_id, str(source_id)) for source_id in self.server.viewer._active_sources()]
+        body = ''.join(
+            f'<figure><img src="/live.mjpg?source={name}" width="512">'
+            f'<figcaption>{escape(WAVELENGTH_INFO.get(name, name))} &middot; '
+            f'<a href="/video.mjpg?source={name}">loop</a> &middot; '
+            f'<a href="/timeline.json?source={name}">timeline</a></figcaption></figure>'
+            for name in names
+        )
+        self._send(f'<!doctype html><title>Sun Viewer</title><body style="background:#000;color:#ccc">{body}'
+                   .encode(), 'text/html; charset=utf-8')
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY.decode()}")
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+    def _send_part(self, frame: Frame):
+        data, timestamp, image_id = frame
+        self.wfile.write(b'--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\nX-Timestamp: %s\r\n\r\n'
+                         % (MJPEG_BOUNDARY, len(data), timestamp.encode()))
+        # The buffered bytes object itself, so each client costs a socket write and no copy
+        self.wfile.write(data)
+        self.wfile.write(b'\r\n')
+        self.server.viewer.metrics.count('served_frames')
+        self.server.viewer.metrics.count('served_bytes', len(data))
+
+    def _live(self, source_id: SourceId, query: dict):
+        """The newest frame, then each newer one as it arrives."""
+        viewer = self.server.viewer
+        self._start_stream()
+        last_id = None
+        while viewer.running:
+            if (buffer := viewer._snapshot(source_id)) and buffer[-1][2] != last_id:
+                self._send_part(buffer[-1])
+                last_id = buffer[-1][2]
+            time.sleep(SERVE_POLL)
+
+    def _video(self, source_id: SourceId, query: dict):
+        """The timeline on a loop at ?fps=, picking up frames added while it plays."""
+        viewer = self.server.viewer
+        try:
+            fps = min(30.0, max(0.1, float(query.get('fps', viewer.video_fps))))
+        except ValueError:
+            return self.send_error(400, "fps must be a number")
+        self._start_stream()
+        period = 1 / fps
+        last_timestamp = ''
+        next_at = time.monotonic()
+        while viewer.running:
+            if not (buffer := viewer._snapshot(source_id)):
+                time.sleep(SERVE_POLL)
+                continue
+            # Position by timestamp, since inserts and trims shift indices between snapshots
+            idx = bisect.bisect_right(buffer, last_timestamp, key=lambda frame: frame[1])
+            frame = buffer[idx] if idx < len(buffer) else buffer[0]
+            self._send_part(frame)
+            last_timestamp = frame[1]
+            # A client that fell behind resumes at the rate instead of catching up in a burst
+            next_at = max(next_at + period, time.monotonic())
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _timeline(self, source_id: SourceId, query: dict):
+        viewer = self.server.viewer
+        name = SOURCE_NAMES.get(source_id, str(source_id))
+        frames = [
+            {'id': image_id, 'timestamp': timestamp, 'tier': viewer._buffered_tier(source_id, image_id),
+             'bytes': len(data), 'url': f"/frame.jpg?source={name}&id={image_id}"}
+            for data, timestamp, image_id in viewer._snapshot(source_id)
+        ]
+        body = json.dumps({'source': source_id, 'name': name, 'frames': frames})
+        self._send(body.encode(), 'application/json')
+
+    def _frame(self, source_id: SourceId, query: dict):
+        """One frame by ?id=, or the newest; a given id's bytes never change."""
+        buffer = self.server.viewer._snapshot(source_id)
+        if 'id' in query:
+            frame = next((frame for frame in buffer if frame[2] == query['id']), None)
+        else:
+            frame = buffer[-1] if buffer else None
+        if frame is None:
+            return self.send_error(404, "No such frame buffered")
+        self._send(frame[0], 'image/jpeg', 'max-age=86400' if 'id' in query else 'no-cache')
 
 
 class SunViewer:
     def __init__(self, source_id: SourceId = 13, initial_mode: str = 'video',
-                 poll_interval: int = POLL_INTERVAL):
+                 poll_interval: int = POLL_INTERVAL,
+                 memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+                 cache_policy: CachePolicy | None = None,
+                 retention: RetentionPolicy | None = None,
+                 decode_workers: int = DECODE_WORKERS,
+                 pixel_frames: int = 0,
+                 warm_budget_mb: int = WARM_BUDGET_MB,
+                 grid: list[SourceId] | None = None,
+                 metrics_log: Path | None = None,
+                 metrics_interval: float = METRICS_LOG_INTERVAL,
+                 difference: str | None = None):
+        self.started = time.monotonic()
+        self.first_frame_at: float | None = None
         pygame.init()
         
         self.source_id = source_id
@@ -192,21 +1911,52 @@ class SunViewer:
         
         self.fullscreen = False
         self.show_info = True
+        self.show_metrics = False
         self.show_help = False
         self.window_size = WINDOW_SIZE
         self._setup_display()
+        self.grid_sources = grid  # Tiles of the grid view; None picks them when it is opened
+        self.grid: list[SourceId] = list(grid or [])  # Tiles on screen, empty for the single view
+        if self.grid:
+            self.source_id = self.grid[0]
+        self.tier = pick_tier((self._display_edge(),) * 2)
 
         self.font_large = pygame.font.Font(None, 24)
         self.font_small = pygame.font.Font(None, 18)
-        self.clock = pygame.time.Clock()
 
-        self.client = HelioviewerClient(source_id)
         self.cache = CacheManager()
+        self.cache_policy = cache_policy or CachePolicy()
+        self.retention = retention or RetentionPolicy()
+        self.resolutions = ResolutionCache()
+        self.metrics = Metrics()
+        self.metrics_log = metrics_log
+        self.metrics_interval = metrics_interval
+        self.fetcher = Fetcher(self.cache, metrics=self.metrics)
+        self.client = HelioviewerClient(self.source_id, self.resolutions, self.fetcher.session)
+        self.clients: dict[SourceId, HelioviewerClient] = {}
+        self.decoder = DecodePool(decode_workers)
+        # Beside the cache rather than in it: CachePolicy caps the JPEGs, and these records are
+        # sized by --decoded-cache alone
+        decoded_dir = self.cache.cache_dir.with_name(f"{self.cache.cache_dir.name}_decoded")
+        self.pixels = PixelStore(decoded_dir, pixel_frames) if pixel_frames > 0 else None
+        if self.pixels:
+            self.cache.listeners.append(self.pixels.invalidate)
+        self.memory_budget = memory_budget_mb * 1024 * 1024  # Shared by self.frames and self.differences
+        self.frames = FrameStore(self.decoder, self.memory_budget, self._display_edge(), self.pixels,
+                                 self.metrics)
+        self.difference = difference  # None, 'running' or 'base'
+        self.differences = DifferenceStore(self.decoder, 0, self._display_edge(), self.metrics)
+        self._split_memory_budget()
+        self.tiles = TileView(self.cache, self.metrics)
+        self.tiles.on_tile = self._request_redraw
+        self.dragging = False
 
-        self.buffers: dict[SourceId, ImageBuffer] = {}
-        self.image_ids: dict[SourceId, set[str]] = {}
-        self.playback_indices: dict[SourceId, int] = {}
+        self.buffers: dict[SourceId, Timeline] = {}
+        self.playback_indices: dict[SourceId, int] = {}  # Only touched by the render thread
+        self.left_at: dict[SourceId, float] = {}  # When each source stopped being current or warmed
+        self.next_retention_at = time.monotonic() + RETENTION_INTERVAL
         self.current_surface: pygame.Surface | None = None
+        self.current_image_id: str | None = None
         self.last_image_time = "Loading..."
 
         self.cached_scaled_surface: pygame.Surface | None = None
@@ -215,53 +1965,203 @@ class SunViewer:
         self.needs_redraw = True
         
         self.running = True
-        self.fetch_lock = threading.Lock()
-        self.prefetch_stop = threading.Event()
+        self.prefetch_stop = threading.Event()  # Replaced, not cleared, for each new prefetch
         self.prefetch_thread = None
+        self.foreground_lock = threading.Lock()
+        self.foreground_prefetches = 0
+        self.foreground_idle = threading.Event()  # Set while no current-source prefetch runs
+        self.foreground_idle.set()
+        self.warm_budget = warm_budget_mb * 1024 * 1024
+        self.warm_stop = threading.Event()
+        self.warm_wakeup = threading.Event()
+        self.pollers: dict[SourceId, CadencePoller] = {}
+        self.poll_wakeup = threading.Event()
 
         self.mode_message = ""
-        self.mode_message_alpha = 0
-        self.playback_counter = 0
+        self.mode_message_alpha = 0.0
+        self.next_frame_at = time.monotonic()  # Deadline of the next video frame
+        self.dropped_frames = 0
+        self.grid_frames: list[tuple[SourceId, Frame] | None] = []  # Shown per tile in video mode
 
-        self._init_buffer(source_id)
+        for source_id in self._active_sources():
+            self._init_buffer(source_id)
     
-    def _init_buffer(self, source_id: SourceId):
-        if source_id not in self.buffers:
-            self.buffers[source_id] = []
-            self.image_ids[source_id] = set()
-            self.playback_indices[source_id] = 0
-
-    def _load_from_cache(self, source_id: SourceId) -> int:
-        """Load all cached images for a source from disk. Returns count loaded."""
-        cached_items = self.cache.get_all_cached(source_id)
-        if not cached_items:
-            return 0
+    def _init_buffer(self, source_id: SourceId) -> Timeline:
+        # setdefault is atomic, so threads racing to create a timeline end up sharing one
+        if (timeline := self.buffers.get(source_id)) is None:
+            timeline = self.buffers.setdefault(source_id, Timeline())
+            self.playback_indices.setdefault(source_id, 0)
+        return timeline
 
-        loaded = 0
-        for image_id, timestamp in cached_items:
-            if image_id in self.image_ids.get(source_id, set()):
-                continue
+    def _active_sources(self) -> list[SourceId]:
+        """Sources on screen: the grid tiles, or just the current source."""
+        return list(self.grid) if self.grid else [self.source_id]
+
+    def _client(self, source_id: SourceId) -> HelioviewerClient:
+        if (client := self.clients.get(source_id)) is None:
+            client = self.clients.setdefault(
+                source_id, HelioviewerClient(source_id, self.resolutions, self.fetcher.session))
+        return client
 
-            image = self.cache.load(source_id, image_id)
-            if not image:
+    def _grid_shape(self) -> tuple[int, int]:
+        """(columns, rows) of the grid, as square as the tile count allows."""
+        cols = math.ceil(math.sqrt(len(self.grid)))
+        return cols, math.ceil(len(self.grid) / cols)
+
+    def _display_edge(self) -> int:
+        """Box edge frames are decoded to fit: the window, or one tile of the grid."""
+        if not self.grid:
+            return min(self.window_size)
+        cols, rows = self._grid_shape()
+        return max(1, min(self.window_size[0] // cols, self.window_size[1] // rows))
+
+    def _aligned(self, frame: Frame) -> list[tuple[SourceId, Frame] | None]:
+        """Per tile, the newest frame at or before the given frame of the first tile, so every
+        tile shows the same moment. Tiles with nothing that old show their oldest frame."""
+        tiles = []
+        for source_id in self.grid:
+            buffer = self._snapshot(source_id)
+            if not buffer:
+                tiles.append(None)
                 continue
+            i = bisect.bisect_right(buffer, frame[1], key=lambda f: f[1]) - 1
+            tiles.append((source_id, buffer[max(i, 0)]))
+        return tiles
 
-            try:
-                surface = self._pil_to_surface(image)
-                with self.fetch_lock:
-                    self._init_buffer(source_id)
-                    self.buffers[source_id].append((surface, timestamp, image_id))
-                    self.image_ids[source_id].add(image_id)
-                loaded += 1
-            except:
+    def _snapshot(self, source_id: SourceId) -> tuple[Frame, ...]:
+        """Current frames of a source; safe to use from any thread without locking."""
+        timeline = self.buffers.get(source_id)
+        return timeline.frames if timeline else ()
+
+    def _buffered_tier(self, source_id: SourceId, image_id: str) -> int:
+        """Tier of an image's buffered bytes, or 0 if it isn't buffered."""
+        timeline = self.buffers.get(source_id)
+        return timeline.tiers.get(image_id, 0) if timeline else 0
+
+    def _insert_frame(self, source_id: SourceId, data: bytes, timestamp: str, image_id: str,
+                      tier: int = DEFAULT_TIER):
+        inserted, replaced = self._init_buffer(source_id).insert(data, timestamp, image_id, tier)
+        if not inserted:
+            return
+        if replaced is not None:
+            self.frames.untrack(replaced)
+            self.frames.discard(source_id, image_id)
+        self.frames.track(data)
+        if replaced is not None and source_id == self.source_id and image_id == self.current_image_id:
+            # Sharper bytes for the frame on screen, e.g. after the window grew
+            self.current_surface = self._surface(source_id, (data, timestamp, image_id))
+            self.cached_scaled_surface = None
+            self.needs_redraw = True
+
+    def _frames_at_tier(self, source_id: SourceId, tier: int) -> int:
+        timeline = self.buffers.get(source_id)
+        return timeline.count_at_tier(tier) if timeline else 0
+
+    def _reference(self, source_id: SourceId, frame: Frame) -> Frame:
+        """What a frame is differenced against: the frame before it, or the oldest buffered.
+
+        The first frame is its own reference, which shows as no change.
+        """
+        buffer = self._snapshot(source_id)
+        if self.difference == 'base':
+            return buffer[0] if buffer else frame
+        idx = bisect.bisect_left(buffer, frame[1], key=lambda item: item[1])
+        return buffer[idx - 1] if idx > 0 else frame
+
+    def _surface(self, source_id: SourceId, frame: Frame) -> pygame.Surface:
+        """The surface to show for a frame in the current display mode."""
+        if self.difference and (surface := self.differences.get(frame, self._reference(source_id, frame))):
+            return surface
+        return self.frames.get(source_id, frame)
+
+    def _queue_differences(self, source_id: SourceId, image_id: str):
+        """Compute the differences a new frame adds or changes, before they are shown."""
+        buffer = self._snapshot(source_id)
+        idx = next((i for i in range(len(buffer) - 1, -1, -1) if buffer[i][2] == image_id), None)
+        if idx is None:
+            return
+        # The new frame's own difference, and in running mode its successor's, whose reference it now is
+        affected = buffer[idx:idx + 2] if self.difference == 'running' else buffer[idx:idx + 1]
+        self.differences.added((frame, self._reference(source_id, frame)) for frame in affected)
+
+    def _retention_limits(self) -> tuple[str, int]:
+        """Oldest timestamp and frame count buffers keep; never less than prefetch asks for."""
+        window = max(self.retention.window, timedelta(minutes=SLOT_MINUTES * self.prefetch_frames))
+        cutoff = (datetime.now(timezone.utc) - window).strftime('%Y-%m-%d %H:%M:%S')
+        return cutoff, max(self.retention.max_frames, self.prefetch_frames)
+
+    def _apply_retention(self):
+        """Trim every buffer to the retention limits and release sources idle for too long.
+
+        Runs on the render thread, the only one that moves playback indices, so an index
+        can be shifted by exactly the frames dropped in front of it.
+        """
+        cutoff, max_frames = self._retention_limits()
+        now = time.monotonic()
+        keep = {*self._active_sources(), *self._neighbours()}
+        for source_id, timeline in list(self.buffers.items()):
+            if source_id in keep:
+                self.left_at.pop(source_id, None)  # The idle clock starts once it drops out
+            elif now - self.left_at.setdefault(source_id, now) > self.retention.idle_release:
+                del self.buffers[source_id]
+                self.playback_indices.pop(source_id, None)
+                self.left_at.pop(source_id, None)
+                released = timeline.release()
+                self.frames.forget(source_id, released)
+                print(f"Released {len(released)} frames of idle source {SOURCE_NAMES.get(source_id, source_id)}")
                 continue
+            if dropped := timeline.trim(cutoff, max_frames):
+                self.frames.forget(source_id, dropped)
+                # Trimming only removes the oldest frames, all of them in front of the index
+                idx = self.playback_indices.get(source_id, 0) - len(dropped)
+                self.playback_indices[source_id] = max(0, idx)
 
-        # Sort buffer by timestamp after loading
-        if loaded > 0:
-            with self.fetch_lock:
-                self.buffers[source_id].sort(key=lambda x: x[1])
+    def _load_cached_any_tier(self, source_id: SourceId, image_id: str, timestamp: str) -> bytes | None:
+        """Buffer the best cached tier of an image, even if below the current tier."""
+        if (tier := self.cache.cached_tier(source_id, image_id, self.tier)) is None:
+            return None
+        if not (frame := self.cache.load(source_id, image_id, tier)):
+            return None
+        self._insert_frame(source_id, frame, timestamp, image_id, tier)
+        return frame
 
+    def _load_from_cache(self, source_id: SourceId, max_bytes: int | None = None) -> int:
+        """Load all cached images for a source from disk, newest first, until the buffer holds
+        max_bytes. Returns count loaded."""
+        loaded = 0
+        timeline = self._init_buffer(source_id)
+        cutoff, max_frames = self._retention_limits()
+        cached = self.cache.get_all_cached(source_id, start=max(cutoff, self.cache_policy.cutoff()))
+        for image_id, timestamp in reversed(cached[-max_frames:]):
+            if max_bytes is not None and timeline.nbytes >= max_bytes:
+                break
+            if self._buffered_tier(source_id, image_id):
+                continue
+            if self._load_cached_any_tier(source_id, image_id, timestamp):
+                loaded += 1
+        timeline.flush()
         return loaded
+
+    def _load_newest_cached(self, source_id: SourceId) -> bool:
+        """Buffer and display the newest cached image for a source. Returns whether there was one."""
+        for image_id, timestamp in reversed(self.cache.get_all_cached(source_id, start=self.cache_policy.cutoff())):
+            if frame := self._load_cached_any_tier(source_id, image_id, timestamp):
+                self._init_buffer(source_id).flush()
+                self.current_surface = self._surface(source_id, (frame, timestamp, image_id))
+                self.current_image_id = image_id
+                self.last_image_time = timestamp
+                self.needs_redraw = True
+                return True
+        return False
+
+    def _stream_from_cache(self, sources: list[SourceId]):
+        """Buffer the rest of the cache in the background, then start the historical prefetch."""
+        started = time.monotonic()
+        loaded = sum(self._load_from_cache(source_id) for source_id in sources)
+        print(f"Loaded {loaded} more cached images in {time.monotonic() - started:.2f}s")
+        # The user may have switched sources meanwhile; that switch started its own prefetch
+        if sources == self._active_sources():
+            self._start_prefetch()
     
     def _setup_display(self):
         flags = pygame.FULLSCREEN if self.fullscreen else pygame.RESIZABLE
@@ -272,18 +2172,16 @@ class SunViewer:
             self.window_size = (self.screen.get_width(), self.screen.get_height())
         pygame.display.set_caption("Live Sun Viewer")
     
-    def _pil_to_surface(self, image: Image.Image) -> pygame.Surface:
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        array = np.array(image).transpose(1, 0, 2)
-        return pygame.surfarray.make_surface(array)
-    
     def _scale_to_fit(self, surface: pygame.Surface) -> pygame.Surface:
         sw, sh = surface.get_size()
         ww, wh = self.window_size
         scale = min(ww / sw, wh / sh)
         new_size = (int(sw * scale), int(sh * scale))
-        return pygame.transform.smoothscale(surface, new_size)
+        # Frames are normally decoded at display size already
+        if new_size == (sw, sh):
+            return surface
+        with self.metrics.timed('scale'):
+            return pygame.transform.smoothscale(surface, new_size)
 
     def _get_scaled_surface(self, surface: pygame.Surface, image_id: str) -> pygame.Surface:
         """Get scaled surface, using cache if available."""
@@ -300,176 +2198,402 @@ class SunViewer:
     
     def _show_message(self, text: str, duration: int = 2000):
         self.mode_message = text
-        self.mode_message_alpha = 255
+        self.mode_message_alpha = 255.0
         self.needs_redraw = True
         pygame.time.set_timer(pygame.USEREVENT + 1, duration)
     
     def _toggle_fullscreen(self):
         self.fullscreen = not self.fullscreen
         self._setup_display()
+        self._apply_window_size()
         self.needs_redraw = True
+
+    def _apply_window_size(self):
+        """Decode for the new window or tile size, and refetch if it needs a sharper tier."""
+        edge = self._display_edge()
+        self.frames.set_edge(edge)
+        self.differences.set_edge(edge)
+        self.cached_scaled_surface = None
+        if self.mode == 'video':
+            self._prebuild_loop()
+        tier = pick_tier((edge, edge))
+        sharper = tier > self.tier
+        self.tier = tier
+        # Before run() starts the first prefetch there is nothing to refetch
+        if sharper and self.prefetch_thread:
+            self._start_prefetch()
+        self._refresh_current()
     
+    def _prebuild_loop(self):
+        """Queue the playback loop, from the current index on, for decoding at the window size."""
+        buffer = self._snapshot(self.source_id)
+        idx = self.playback_indices.get(self.source_id, 0)
+        loop = buffer[idx:] + buffer[:idx]
+        if self.grid:
+            self.frames.prebuild(tile for frame in loop for tile in self._aligned(frame) if tile)
+        else:
+            self.frames.prebuild((self.source_id, frame) for frame in loop)
+
     def _cycle_source(self, direction: int):
         sources = list(SOURCES.values())
         idx = sources.index(self.source_id)
+        self.left_at[self.source_id] = time.monotonic()
         self.source_id = sources[(idx + direction) % len(sources)]
         self.client.source_id = self.source_id
+        if self.grid:
+            self.grid[0] = self.source_id  # The first tile follows the arrows
 
         self._init_buffer(self.source_id)
-        self._start_prefetch(self.source_id)
+        # Whatever was warmed plays right away; the cache and prefetch fill in the rest
+        threading.Thread(target=self._stream_from_cache, args=(self._active_sources(),), daemon=True).start()
+        self.poll_wakeup.set()
+        self._start_warming()
         self.needs_redraw = True
 
         self._show_message(f"Source: {SOURCE_NAMES.get(self.source_id, 'Unknown')}")
     
-    def _start_prefetch(self, source_id: SourceId):
-        if self.prefetch_thread and self.prefetch_thread.is_alive():
-            self.prefetch_stop.set()
-            self.prefetch_thread.join(timeout=0.5)
-            self.prefetch_stop.clear()
-        
-        self.prefetch_thread = threading.Thread(
-            target=self._prefetch_historical, 
-            args=(source_id,), 
-            daemon=True
-        )
-        self.prefetch_thread.start()
+    def _start_prefetch(self):
+        """Prefetch the sources on screen in the background. A prefetch still running is told
+        to stop, but not waited for: its in-flight downloads finish on their own threads."""
+        self.prefetch_stop.set()
+        self.prefetch_stop = threading.Event()
+        sources = self._active_sources()
+        for source_id in sources:
+            self.prefetch_thread = threading.Thread(
+                target=self._prefetch_historical,
+                args=(source_id, self.prefetch_stop),
+                kwargs={'share': len(sources)},
+                daemon=True
+            )
+            self.prefetch_thread.start()
+
+    def _toggle_grid(self):
+        """Switch between the single view and the grid, which plays its tiles in sync."""
+        if self.grid:
+            self.grid = []
+        else:
+            sources = list(SOURCES.values())
+            idx = sources.index(self.source_id)
+            self.grid = list(self.grid_sources or (sources[(idx + i) % len(sources)] for i in range(GRID_SIZE)))
+            self.source_id = self.client.source_id = self.grid[0]
+            self.tiles.reset()
+        self._show_message(f"Grid: {', '.join(SOURCE_NAMES.get(s, str(s)) for s in self.grid)}"
+                           if self.grid else "Grid: OFF")
+        self._apply_window_size()
+        threading.Thread(target=self._stream_from_cache, args=(self._active_sources(),), daemon=True).start()
+        self.poll_wakeup.set()
+        self._start_warming()
+        self.needs_redraw = True
+
+    def _neighbours(self) -> list[SourceId]:
+        """Sources next to the current one in cycling order, nearest first; none in the grid,
+        whose tiles all prefetch at full priority."""
+        if self.grid:
+            return []
+        sources = list(SOURCES.values())
+        idx = sources.index(self.source_id)
+        return [
+            sources[(idx + sign * step) % len(sources)]
+            for step in range(1, WARM_NEIGHBOURS + 1) for sign in (1, -1)
+        ]
+
+    def _start_warming(self):
+        """Restart warming around the current source, dropping the warm-up of the old one."""
+        self.warm_stop.set()
+        self.warm_stop = threading.Event()
+        self.warm_wakeup.set()
+
+    def _warm_worker(self):
+        """Fill the neighbours' buffers at low priority, so cycling to them plays at once.
+
+        Each gets an equal share of the warm budget, from the cache first. Downloads only
+        run while no prefetch for the current source does.
+        """
+        while self.running:
+            self.warm_wakeup.wait()
+            self.warm_wakeup.clear()
+            stop = self.warm_stop
+            neighbours = [source_id for source_id in self._neighbours() if source_id not in self._active_sources()]
+            if not self.warm_budget or not neighbours:
+                continue
+            share = self.warm_budget // len(neighbours)
+            for source_id in neighbours:
+                if stop.is_set():
+                    break
+                try:
+                    self._load_from_cache(source_id, share)
+                    self._prefetch_historical(source_id, stop, max_bytes=share)
+                except Exception as e:
+                    print(f"Warming source {source_id} failed: {e}")
+
+    def _toggle_difference(self):
+        """Cycle the display through normal, running-difference and base-difference frames."""
+        self.difference = {None: 'running', 'running': 'base', 'base': None}[self.difference]
+        self.tiles.reset()
+        self._show_message(f"Difference: {self.difference.upper()}" if self.difference else "Difference: OFF")
+        self._split_memory_budget()
+        self._refresh_current()
+
+    def _split_memory_budget(self):
+        """Give differences their share of the memory budget while they're shown, and the
+        decoded frames all of it otherwise."""
+        share = int(self.memory_budget * DIFFERENCE_BUDGET_SHARE) if self.difference else 0
+        self.differences.set_budget(share)
+        self.frames.set_budget(self.memory_budget - share)
+
+    def _adjust_contrast(self, factor: float):
+        if not self.difference:
+            return
+        self.differences.set_gain(min(DIFFERENCE_GAIN_MAX, max(1, self.differences.gain * factor)))
+        self._show_message(f"Difference contrast: x{self.differences.gain:g}")
+        self._refresh_current()
+
+    def _refresh_current(self):
+        """Redo the shown surface for a change of display mode, without moving playback."""
+        buffer = self._snapshot(self.source_id)
+        if frame := next((frame for frame in reversed(buffer) if frame[2] == self.current_image_id), None):
+            self.current_surface = self._surface(self.source_id, frame)
+        self.cached_scaled_surface = None
+        self.needs_redraw = True
+
+    def _request_redraw(self):
+        self.needs_redraw = True
+
+    def _zoom(self, factor: float, anchor: tuple[float, float] = (0.0, 0.0)):
+        """Zoom the single view by factor about anchor (window edges from the centre); 0 resets it."""
+        if self.grid or self.difference:
+            self._show_message("Zoom works in the single view, without differencing")
+            return
+        if factor:
+            self.tiles.zoom_by(factor, anchor)
+        else:
+            self.tiles.reset()
+        if not self.tiles.zoomed:
+            self.next_frame_at = time.monotonic()  # Playback resumes from the frame it held
+        self._show_message(f"Zoom: {self.tiles.zoom:g}x" if self.tiles.zoomed else "Zoom: fit")
+        self.needs_redraw = True
+
+    def _set_foreground(self, delta: int):
+        with self.foreground_lock:
+            self.foreground_prefetches += delta
+            if self.foreground_prefetches:
+                self.foreground_idle.clear()
+            else:
+                self.foreground_idle.set()
     
     def _toggle_mode(self):
         self.mode = 'live' if self.mode == 'video' else 'video'
         self.needs_redraw = True
-        self.playback_counter = 0
+        self.next_frame_at = time.monotonic()
         self.cached_scaled_surface = None
         self._show_message(f"Mode: {self.mode.upper()}")
 
         if self.mode == 'live':
             # Jump to most recent buffered image immediately
-            buffer = self.buffers.get(self.source_id, [])
-            if buffer:
-                with self.fetch_lock:
-                    self.current_surface, self.last_image_time, _ = buffer[-1]
-                    self.playback_indices[self.source_id] = len(buffer) - 1
+            if buffer := self._snapshot(self.source_id):
+                self.last_image_time = buffer[-1][1]
+                self.playback_indices[self.source_id] = len(buffer) - 1
+                self.current_surface = self._surface(self.source_id, buffer[-1])
+                self.current_image_id = buffer[-1][2]
             # Also fetch a brand new image in the background
             threading.Thread(target=self._fetch_latest, daemon=True).start()
+        else:
+            self._prebuild_loop()
     
     def _fetch_latest(self):
+        source_id = self.source_id
         now = datetime.now(timezone.utc)
         data = self.client.get_closest_image(now - timedelta(seconds=30))
 
         if data and 'id' in data:
-            if (image := self.client.download_image(data['id'])):
-                surface = self._pil_to_surface(image)
-                self.current_surface = surface
-                self.last_image_time = data.get('date', 'Unknown')
+            timestamp = data.get('date', 'Unknown')
+            if fetched := self.fetcher.fetch(self.client, source_id, data['id'], timestamp, self.tier):
+                self.last_image_time = timestamp
+                self.current_surface = self._surface(source_id, (fetched[0], timestamp, data['id']))
+                self.current_image_id = data['id']
                 self.needs_redraw = True
-                self.cache.save(self.source_id, data['id'], image, self.last_image_time)
     
-    def _prefetch_historical(self, source_id: SourceId):
-        with self.fetch_lock:
-            current_count = len(self.buffers.get(source_id, []))
-            if current_count >= self.prefetch_frames:
+    def _prefetch_historical(self, source_id: SourceId, stop: threading.Event, max_bytes: int | None = None,
+                             share: int = 1):
+        """Fill a source's buffer up to prefetch_frames, newest first, until `stop` is set.
+
+        With max_bytes this is a warm-up: it stops once the buffer holds that much, runs
+        fewer workers, and downloads only while the current source isn't prefetching.
+        Prefetches running side by side for a grid each take a `share` of the workers.
+        """
+        warm = max_bytes is not None
+        tier = self.tier
+        timeline = self._init_buffer(source_id)
+        current_count = self._frames_at_tier(source_id, tier)
+        if current_count >= self.prefetch_frames or (warm and timeline.nbytes >= max_bytes):
+            if not warm:
                 print(f"Already have {current_count} frames, skipping prefetch")
-                return
+            return
         
         frames_needed = self.prefetch_frames - current_count
         if frames_needed <= 0:
             return
             
-        print(f"Pre-fetching {frames_needed} more frames for source {source_id} (have {current_count}, want {self.prefetch_frames})...")
+        print(f"{'Warming' if warm else 'Pre-fetching'} {frames_needed} more frames for source {source_id} "
+              f"(have {current_count}, want {self.prefetch_frames})...")
         
-        client = HelioviewerClient(source_id)
         now = datetime.now(timezone.utc)
-        cached_count = downloaded_count = skipped_count = 0
-        
+        counts = dict.fromkeys(('skipped', 'cached', 'downloaded'), 0)
+        fetched_bytes = 0
+
         # Round to nearest 12-minute boundary for consistent timestamps
-        base_minute = (now.minute // 12) * 12
+        base_minute = (now.minute // SLOT_MINUTES) * SLOT_MINUTES
         base_time = now.replace(minute=base_minute, second=0, microsecond=0)
-        
-        for i in range(self.prefetch_frames):
-            if self.prefetch_stop.is_set():
-                return
-            
-            with self.fetch_lock:
-                if len(self.buffers.get(source_id, [])) >= self.prefetch_frames:
-                    break
-            
-            target_time = base_time - timedelta(minutes=i * 12)
-            
-            try:
-                if not (data := client.get_closest_image(target_time)):
-                    continue
-                
-                image_id = data['id']
-                
-                # Check if already in our buffer
-                if image_id in self.image_ids.get(source_id, set()):
-                    skipped_count += 1
-                    continue
-                
-                timestamp = data.get('date', 'Unknown')
-                
-                if self.cache.is_cached(source_id, image_id):
-                    if image := self.cache.load(source_id, image_id):
-                        cached_count += 1
-                else:
-                    if not (image := client.download_image(image_id)):
+
+        # Workers share one client; it's stateless apart from the pooled session
+        client = HelioviewerClient(source_id, self.resolutions, self.fetcher.session)
+        download_slots = threading.Semaphore(WARM_DOWNLOADS if warm else max(1, PREFETCH_DOWNLOADS // share))
+
+        def fetch_slot(target_time: datetime) -> tuple[str, int] | None:
+            """Resolve and buffer one slot. Returns (outcome, bytes) or None if nothing was added."""
+            if stop.is_set():
+                return None
+            if self._frames_at_tier(source_id, tier) >= self.prefetch_frames:
+                return None
+            if warm and timeline.nbytes >= max_bytes:
+                return None
+
+            if not (data := client.resolve_slot(target_time)):
+                return None
+
+            image_id = data['id']
+
+            # Check if already in our buffer at this tier
+            if self._buffered_tier(source_id, image_id) >= tier:
+                return 'skipped', 0
+
+            timestamp = data.get('date', 'Unknown')
+
+            if cached := self.fetcher.cached(source_id, image_id, tier):
+                frame, frame_tier = cached
+                outcome = 'cached'
+            else:
+                # Warm-ups yield the network to the current source
+                while warm and not self.foreground_idle.wait(IDLE_WAIT):
+                    if stop.is_set():
+                        return None
+                with download_slots:
+                    if stop.is_set() or not (fetched := self.fetcher.fetch(client, source_id, image_id, timestamp, tier)):
+                        return None
+                frame, frame_tier = fetched
+                outcome = 'downloaded'
+
+            self._insert_frame(source_id, frame, timestamp, image_id, frame_tier)
+            return outcome, len(frame)
+
+        # Slots are submitted newest-first, so playback can start on a partial timeline
+        started = time.monotonic()
+        if not warm:
+            self._set_foreground(1)
+        try:
+            with ThreadPoolExecutor(max_workers=WARM_WORKERS if warm else max(1, PREFETCH_WORKERS // share),
+                                    thread_name_prefix='warm' if warm else 'prefetch') as pool:
+                futures = [
+                    pool.submit(fetch_slot, base_time - timedelta(minutes=i * SLOT_MINUTES))
+                    for i in range(self.prefetch_frames)
+                ]
+                for future in as_completed(futures):
+                    if stop.is_set():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        return
+                    try:
+                        result = future.result()
+                    except Exception:
                         continue
-                    self.cache.save(source_id, image_id, image, timestamp)
-                    downloaded_count += 1
-                
-                try:
-                    surface = self._pil_to_surface(image)
-                    with self.fetch_lock:
-                        self._init_buffer(source_id)
-                        bisect.insort(self.buffers[source_id], (surface, timestamp, image_id), key=lambda x: x[1])
-                        self.image_ids[source_id].add(image_id)
-                except:
-                    continue
-                    
-            except:
-                continue
-        
-        total_frames = len(self.buffers.get(source_id, []))
-        print(f"Pre-fetch complete: {total_frames} frames (skipped: {skipped_count}, cached: {cached_count}, downloaded: {downloaded_count})")
-    
+                    if result:
+                        outcome, size = result
+                        counts[outcome] += 1
+                        fetched_bytes += size
+        finally:
+            # Publish the tail of the batch, even when cancelled
+            timeline.flush()
+            if not warm:
+                self._set_foreground(-1)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        fetched = counts['cached'] + counts['downloaded']
+        total_frames = len(self._snapshot(source_id))
+        print(f"{'Warm-up' if warm else 'Pre-fetch'} complete for source {source_id}: {total_frames} frames in {elapsed:.1f}s "
+              f"({fetched / elapsed:.1f} frames/s, {fetched_bytes / elapsed / 1e6:.2f} MB/s; "
+              f"skipped: {counts['skipped']}, cached: {counts['cached']}, downloaded: {counts['downloaded']})")
+
+    def _poll_latest(self, source_id: SourceId) -> str | None:
+        """Fetch the newest image for a source into its buffer. Returns its date, None on failure."""
+        now = datetime.now(timezone.utc)
+        target_time = now - timedelta(minutes=2)  # Always fetch recent images (2 min accounts for API delay)
+
+        client = self._client(source_id)
+        if not (data := client.get_closest_image(target_time)) or 'id' not in data:
+            return None
+
+        image_id = data['id']
+        timestamp = data.get('date', 'Unknown')
+        tier = self.tier
+        if self._buffered_tier(source_id, image_id) >= tier:
+            return timestamp
+
+        if cached := self.fetcher.cached(source_id, image_id, tier):
+            frame, tier = cached
+        elif fetched := self.fetcher.fetch(client, source_id, image_id, timestamp, tier):
+            frame, tier = fetched
+        else:
+            return None
+
+        self._insert_frame(source_id, frame, timestamp, image_id, tier)
+        self._init_buffer(source_id).flush()
+        if self.difference:
+            self._queue_differences(source_id, image_id)
+        if self.mode == 'live' and source_id == self.source_id:
+            self.current_surface = self._surface(source_id, (frame, timestamp, image_id))
+            self.current_image_id = image_id
+            self.last_image_time = timestamp
+            self.needs_redraw = True
+        elif self.mode == 'live' and source_id in self.grid:
+            self.needs_redraw = True
+        return timestamp
+
     def _fetch_worker(self):
         while self.running:
+            # Whichever source on screen is due first; every grid tile keeps its own cadence
+            source_id, poller = min(
+                ((source_id, self.pollers.setdefault(source_id, CadencePoller(self.poll_interval)))
+                 for source_id in self._active_sources()),
+                key=lambda item: item[1].next_poll_at,
+            )
+            # Sleep until this source's next poll; a source switch wakes us early
+            if (wait := poller.next_poll_at - time.time()) > 0:
+                self.poll_wakeup.wait(wait)
+                self.poll_wakeup.clear()
+                continue
+
             try:
-                now = datetime.now(timezone.utc)
-                target_time = now - timedelta(minutes=2)  # Always fetch recent images (2 min accounts for API delay)
-                
-                if not (data := self.client.get_closest_image(target_time)):
-                    continue
-                
-                image_id = data['id']
-                if image_id not in self.image_ids.get(self.source_id, set()):
-                    timestamp = data.get('date', 'Unknown')
-                    
-                    if self.cache.is_cached(self.source_id, image_id):
-                        image = self.cache.load(self.source_id, image_id)
-                    else:
-                        image = self.client.download_image(image_id)
-                        if image:
-                            self.cache.save(self.source_id, image_id, image, timestamp)
-                    
-                    if image:
-                        try:
-                            surface = self._pil_to_surface(image)
-                            with self.fetch_lock:
-                                self._init_buffer(self.source_id)
-                                bisect.insort(self.buffers[self.source_id], (surface, timestamp, image_id), key=lambda x: x[1])
-                                self.image_ids[self.source_id].add(image_id)
-
-                                if self.mode == 'live':
-                                    self.current_surface = surface
-                                    self.last_image_time = timestamp
-                                    self.needs_redraw = True
-                        except:
-                            pass
-            except:
-                pass
-            
-            time.sleep(self.poll_interval)
+                timestamp = self._poll_latest(source_id)
+            except Exception:
+                timestamp = None
+            if timestamp is None:
+                poller.failed()
+            else:
+                poller.observe(timestamp)
     
+    def _evict_worker(self):
+        while self.running:
+            try:
+                removed, freed = self.cache.evict(self.cache_policy)
+                if removed:
+                    print(f"Cache eviction: removed {removed} images ({freed / 1e6:.1f} MB)")
+                removed, freed = self.cache.evict_tiles(self.cache_policy.tile_max_bytes)
+                if removed:
+                    print(f"Cache eviction: removed {removed} tiles ({freed / 1e6:.1f} MB)")
+                self.resolutions.evict(self.cache_policy.max_age)
+            except Exception as e:
+                print(f"Cache eviction failed: {e}")
+            time.sleep(CACHE_EVICT_INTERVAL)
+
     def _handle_keydown(self, event: pygame.event.Event):
         key = event.key
         mods = event.mod
@@ -486,10 +2610,29 @@ class SunViewer:
             self._cycle_source(-1)
         elif key == pygame.K_RIGHT:
             self._cycle_source(1)
+        elif key == pygame.K_g:
+            self._toggle_grid()
         elif key == pygame.K_i:
             self.show_info = not self.show_info
             self.needs_redraw = True
             self._show_message(f"Info: {'ON' if self.show_info else 'OFF'}")
+        elif key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+            self._zoom(2)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self._zoom(0.5)
+        elif key == pygame.K_0:
+            self._zoom(0)
+        elif key in (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d) and self.tiles.zoomed:
+            dx, dy = {pygame.K_w: (0, -1), pygame.K_a: (-1, 0), pygame.K_s: (0, 1), pygame.K_d: (1, 0)}[key]
+            self.tiles.pan_by(dx * PAN_STEP, dy * PAN_STEP)
+            self.needs_redraw = True
+        elif key == pygame.K_x:
+            self._toggle_difference()
+        elif key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+            self._adjust_contrast(2 if key == pygame.K_RIGHTBRACKET else 0.5)
+        elif key == pygame.K_p:
+            self.show_metrics = not self.show_metrics
+            self.needs_redraw = True
         elif key == pygame.K_h:
             self.show_help = not self.show_help
             self.needs_redraw = True
@@ -505,7 +2648,7 @@ class SunViewer:
             else:
                 self.prefetch_frames = max(10, self.prefetch_frames - 10)
             self._show_message(f"Buffer: {self.prefetch_frames} frames (~{self.prefetch_frames * 0.2:.1f} hours)")
-            self._start_prefetch(self.source_id)
+            self._start_prefetch()
     
     def _draw_info(self):
         if not self.show_info:
@@ -514,9 +2657,14 @@ class SunViewer:
         source_name = SOURCE_NAMES.get(self.source_id, 'Unknown')
         wavelength_desc = WAVELENGTH_INFO.get(source_name, source_name)
         
-        buffer = self.buffers.get(self.source_id, [])
-        buffer_info = f" | Buffer: {len(buffer)} frames" if self.mode == 'video' else ""
+        buffer = self._snapshot(self.source_id)
+        memory_mb = (self.frames.encoded_bytes + self.frames.decoded_bytes) / (1024 * 1024)
+        buffer_info = f" | Buffer: {len(buffer)} frames ({memory_mb:.0f} MB)" if self.mode == 'video' else ""
         fps_info = f" | Video FPS: {self.video_fps}" if self.mode == 'video' else ""
+        if self.tiles.zoomed and not self.grid:
+            fps_info = f" | Zoom: {self.tiles.zoom:g}x" + (" (held)" if self.mode == 'video' else "")
+        if self.difference:
+            fps_info += f" | {self.difference.capitalize()} difference x{self.differences.gain:g}"
         
         delay_info = ""
         if self.last_image_time and self.last_image_time != "Loading...":
@@ -532,6 +2680,11 @@ class SunViewer:
             f"Image: {self.last_image_time} UTC{delay_info}",
             f"Mode: {self.mode.upper()}{buffer_info}{fps_info}",
         ]
+        if self.grid:
+            lines.append(f"Grid: {' | '.join(f'{SOURCE_NAMES.get(s, s)} {len(self._snapshot(s))}' for s in self.grid)}")
+        if self.mode == 'live' and (poller := self.pollers.get(self.source_id)):
+            lines.append(poller.summary())
+        lines.append(self.fetcher.summary())
         
         y = 10
         for line in lines:
@@ -548,7 +2701,7 @@ class SunViewer:
         
         if self.mode_message_alpha > 0:
             msg = self.font_large.render(self.mode_message, True, (255, 255, 255))
-            msg.set_alpha(self.mode_message_alpha)
+            msg.set_alpha(int(self.mode_message_alpha))
             msg_rect = msg.get_rect(center=(self.window_size[0] // 2, self.window_size[1] // 2))
 
             bg = pygame.Surface((msg_rect.width + 20, msg_rect.height + 10))
@@ -559,6 +2712,82 @@ class SunViewer:
             self.screen.blit(bg, bg_rect)
             self.screen.blit(msg, msg_rect)
     
+    def _metrics_lines(self) -> list[str]:
+        def ms(name: str) -> str:
+            return f"{value:.1f} ms" if (value := self.metrics.mean_ms(name)) is not None else "-"
+
+        hit_ratio = self.fetcher.hit_ratio()
+        downloaded_mb = self.metrics.counters.get('download_bytes', 0) / 1e6
+        return [
+            f"API: {ms('api')} | Download: {ms('download')} ({downloaded_mb:.1f} MB total)"
+            f" | Cache hits: {f'{hit_ratio:.0%}' if hit_ratio is not None else '-'}",
+            f"Decode: {ms('decode')} | Scale: {ms('scale')} | Draw: {ms('draw')} | Flip: {ms('flip')}",
+            f"Waits: fetch {ms('fetch_wait')}, cache claim {ms('claim_wait')} | Dropped frames: {self.dropped_frames}",
+        ]
+
+    def _draw_metrics(self):
+        """Per-stage timings, averaged over recent samples, along the bottom of the window."""
+        lines = self._metrics_lines()
+        y = self.window_size[1] - 10
+        for line in reversed(lines):
+            text = self.font_small.render(line, True, (200, 200, 200))
+            y -= text.get_height() + 5
+            bg = pygame.Surface((text.get_width() + 10, text.get_height() + 4))
+            bg.set_alpha(180)
+            bg.fill((0, 0, 0))
+            self.screen.blit(bg, (10, y))
+            self.screen.blit(text, (15, y + 2))
+
+    def _metrics_worker(self):
+        """Append a JSON line of metrics to the log every metrics_interval seconds."""
+        next_at = time.monotonic() + self.metrics_interval
+        while self.running:
+            time.sleep(min(IDLE_WAIT * 10, max(0.0, next_at - time.monotonic())))
+            if time.monotonic() < next_at:
+                continue
+            next_at += self.metrics_interval
+            record = {
+                'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'source': self.source_id,
+                'mode': self.mode,
+                'grid': self.grid,
+                'buffered': {source_id: len(self._snapshot(source_id)) for source_id in self._active_sources()},
+                'memory_mb': round((self.frames.encoded_bytes + self.frames.decoded_bytes) / (1024 * 1024), 1),
+                'dropped_frames': self.dropped_frames,
+                'fetcher': dict(self.fetcher.stats),
+                **self.metrics.snapshot(),
+            }
+            try:
+                with open(self.metrics_log, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            except OSError as e:
+                print(f"Failed to write metrics log: {e}")
+
+    def _draw_grid(self):
+        """Draw every tile: the synced frames in video mode, the newest of each source in live."""
+        if self.mode == 'live':
+            tiles = [(source_id, buffer[-1]) if (buffer := self._snapshot(source_id)) else None
+                     for source_id in self.grid]
+        else:
+            tiles = self.grid_frames
+        cols, _ = self._grid_shape()
+        edge = self._display_edge()
+        for i, tile in enumerate(tiles):
+            x0, y0 = (i % cols) * edge, (i // cols) * edge
+            if tile:
+                surface = self._surface(*tile)
+                if surface.get_size() != (size := _fit(surface.get_size(), edge)):
+                    with self.metrics.timed('scale'):
+                        surface = pygame.transform.smoothscale(surface, size)
+                self.screen.blit(surface, (x0 + (edge - surface.get_width()) // 2,
+                                           y0 + (edge - surface.get_height()) // 2))
+            label = self.font_small.render(SOURCE_NAMES.get(self.grid[i], str(self.grid[i])), True, (200, 200, 200))
+            bg = pygame.Surface((label.get_width() + 10, label.get_height() + 4))
+            bg.set_alpha(180)
+            bg.fill((0, 0, 0))
+            self.screen.blit(bg, (x0 + edge - bg.get_width() - 5, y0 + 5))
+            self.screen.blit(label, (x0 + edge - label.get_width() - 10, y0 + 7))
+
     def _draw_help(self):
         overlay = pygame.Surface(self.window_size)
         overlay.set_alpha(240)
@@ -571,9 +2800,15 @@ class SunViewer:
             "F / F11        - Toggle fullscreen",
             "M / Space      - Switch mode (Live/Video)",
             "Left/Right     - Cycle through wavelengths",
+            "G              - Toggle the multi-wavelength grid",
             "Up/Down        - Adjust video FPS (0.5-30)",
             "b / B          - Decrease/increase buffer size",
+            "X              - Cycle running/base difference",
+            "[ / ]          - Difference contrast",
+            "+ / - / 0      - Zoom in, out, back to the whole disk",
+            "W/A/S/D, drag  - Pan while zoomed in",
             "I              - Toggle info display",
+            "P              - Toggle performance metrics",
             "H              - Show/hide this help",
             "ESC / Q / Ctrl+C - Quit",
         ]
@@ -587,101 +2822,275 @@ class SunViewer:
             self.screen.blit(text, rect)
             y += 30
     
+    def serve(self, host: str, port: int, tier: int):
+        """Run the fetch pipeline without drawing, and serve its frames over HTTP until stopped."""
+        self.tier = tier
+        server = FeedServer((host, port), self)
+        threading.Thread(target=self._stream_from_cache, args=(self._active_sources(),), daemon=True).start()
+        threading.Thread(target=self._fetch_worker, daemon=True).start()
+        threading.Thread(target=self._evict_worker, daemon=True).start()
+        if self.metrics_log:
+            threading.Thread(target=self._metrics_worker, daemon=True).start()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        names = ', '.join(SOURCE_NAMES.get(source_id, str(source_id)) for source_id in self._active_sources())
+        print(f"Serving {names} on http://{host}:{server.server_port}/")
+        try:
+            while self.running:
+                time.sleep(RETENTION_INTERVAL)
+                self._apply_retention()
+        finally:
+            self.running = False
+            self._stop_background()
+            server.shutdown()
+            server.server_close()
+            print(self.fetcher.summary())
+
+    def _stop_background(self):
+        """Cancel prefetches, warm-ups and tile loads, whose pool threads would otherwise hold up exit."""
+        self.prefetch_stop.set()
+        self.warm_stop.set()
+        self.tiles.pool.shutdown(wait=False, cancel_futures=True)
+
     def run(self):
-        # Load cached images first (fast, no API calls)
-        print(f"Loading cached images for source {self.source_id}...")
-        cached_count = self._load_from_cache(self.source_id)
-        print(f"Loaded {cached_count} cached images")
-
-        # Display latest cached image immediately if available
-        if cached_count > 0:
-            buffer = self.buffers.get(self.source_id, [])
-            if buffer:
-                self.current_surface, self.last_image_time, _ = buffer[-1]
-                self._show_message(f"Loaded {cached_count} cached images", 2000)
-        else:
+        # Show the newest cached image right away; the rest of the cache streams in
+        # behind it while playback is already running
+        if not self._load_newest_cached(self.source_id):
             self._show_message("Loading solar imagery...", 3000)
 
-        # Start background threads for fetching new images
-        self._start_prefetch(self.source_id)
-        threading.Thread(target=self._fetch_worker, daemon=True).start()
+        try:
+            # Start background threads for loading and fetching images
+            threading.Thread(target=self._stream_from_cache, args=(self._active_sources(),), daemon=True).start()
+            threading.Thread(target=self._fetch_worker, daemon=True).start()
+            threading.Thread(target=self._evict_worker, daemon=True).start()
+            threading.Thread(target=self._warm_worker, daemon=True).start()
+            if self.metrics_log:
+                threading.Thread(target=self._metrics_worker, daemon=True).start()
+            self._start_warming()
 
-        current_image_id = None
+            last_step = time.monotonic()
 
-        while self.running:
-            # Event handling: use wait() in live mode, get() in video mode
-            if self.mode == 'live' and self.mode_message_alpha == 0:
-                # In live mode with no animations, wait for events (near-zero CPU)
-                event = pygame.event.wait(timeout=100)
-                events = [event] if event.type != pygame.NOEVENT else []
-                events.extend(pygame.event.get())
-            else:
-                # In video mode or during animations, poll normally
-                events = pygame.event.get()
-
-            for event in events:
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    self._handle_keydown(event)
-                elif event.type == pygame.VIDEORESIZE and not self.fullscreen:
-                    self.window_size = (event.w, event.h)
-                    self.screen = pygame.display.set_mode(self.window_size, pygame.RESIZABLE)
-                    self.needs_redraw = True
-                elif event.type == pygame.USEREVENT + 1:
-                    pygame.time.set_timer(pygame.USEREVENT + 1, 0)
+            while self.running:
+                # Sleep until the next video frame is due, the fade animation needs a step, or
+                # an event arrives. Live mode with nothing animating just polls for new images.
+                # Video held while zoomed in waits like live mode; unzooming restarts its deadline.
+                held = self.tiles.zoomed and not self.grid
+                timeout = IDLE_WAIT
+                if self.mode == 'video' and not held and self._snapshot(self.source_id):
+                    timeout = min(timeout, self.next_frame_at - time.monotonic())
+                if self.mode_message_alpha > 0:
+                    timeout = min(timeout, ANIMATION_STEP)
+                if timeout > 0:
+                    event = pygame.event.wait(timeout=math.ceil(timeout * 1000))
+                    events = [event] if event.type != pygame.NOEVENT else []
+                    events.extend(pygame.event.get())
+                else:
+                    events = pygame.event.get()
+
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                    elif event.type == pygame.KEYDOWN:
+                        self._handle_keydown(event)
+                    elif event.type == pygame.MOUSEWHEEL:
+                        x, y = pygame.mouse.get_pos()
+                        self._zoom(2 ** (event.y / 2), ((x - self.window_size[0] / 2) / min(self.window_size),
+                                                       (y - self.window_size[1] / 2) / min(self.window_size)))
+                    elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        self.dragging = True
+                    elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                        self.dragging = False
+                    elif event.type == pygame.MOUSEMOTION and self.dragging and self.tiles.zoomed:
+                        edge = min(self.window_size)
+                        self.tiles.pan_by(-event.rel[0] / edge, -event.rel[1] / edge)
+                        self.needs_redraw = True
+                    elif event.type == pygame.VIDEORESIZE and not self.fullscreen:
+                        self.window_size = (event.w, event.h)
+                        self.screen = pygame.display.set_mode(self.window_size, pygame.RESIZABLE)
+                        self._apply_window_size()
+                        self.needs_redraw = True
+                    elif event.type == pygame.USEREVENT + 1:
+                        pygame.time.set_timer(pygame.USEREVENT + 1, 0)
+                        self.needs_redraw = True
+
+                buffer = self._snapshot(self.source_id)
+                now = time.monotonic()
+                held = self.tiles.zoomed and not self.grid
+
+                if self.mode == 'video' and not buffer:
+                    self.next_frame_at = now  # Nothing to fall behind on yet
+                elif self.mode == 'video' and not held and now >= self.next_frame_at:
+                    period = 1 / self.video_fps
+                    # Deadlines advance by whole periods so the rate stays exact; frames whose
+                    # deadline already passed are dropped rather than shown late
+                    dropped = int((now - self.next_frame_at) / period)
+                    self.dropped_frames += dropped
+                    self.next_frame_at += (dropped + 1) * period
+
+                    n = len(buffer)
+                    idx = (self.playback_indices.get(self.source_id, 0) + dropped) % n
+
+                    _, self.last_image_time, image_id = buffer[idx]
+                    upcoming = [buffer[(idx + k) % n] for k in range(1, min(DECODE_AHEAD, n - 1) + 1)]
+                    self.playback_indices[self.source_id] = (idx + 1) % n
+
+                    if self.grid:
+                        self.grid_frames = self._aligned(buffer[idx])
+                        self.frames.decode_ahead(tile for frame in upcoming for tile in self._aligned(frame) if tile)
+                    else:
+                        self.current_surface = self._surface(self.source_id, buffer[idx])
+                        self.frames.decode_ahead((self.source_id, frame) for frame in upcoming)
+                    if self.difference:
+                        tiles = [tile for frame in upcoming for tile in self._aligned(frame) if tile] if self.grid \
+                            else [(self.source_id, frame) for frame in upcoming]
+                        self.differences.ahead((frame, self._reference(source_id, frame)) for source_id, frame in tiles)
+                    if image_id != self.current_image_id:
+                        self.current_image_id = image_id
+                        self.needs_redraw = True
+
+                if now >= self.next_retention_at:
+                    self._apply_retention()
+                    self.next_retention_at = now + RETENTION_INTERVAL
+
+                # Handle fade animation
+                if self.mode_message_alpha > 0:
+                    self.mode_message_alpha = max(0.0, self.mode_message_alpha - FADE_PER_SECOND * (now - last_step))
                     self.needs_redraw = True
+                last_step = now
 
-            buffer = self.buffers.get(self.source_id, [])
-
-            if self.mode == 'video' and buffer:
-                self.playback_counter += 1
-                playback_interval = max(1, int(60 / self.video_fps))
-
-                if self.playback_counter >= playback_interval:
-                    self.playback_counter = 0
-                    with self.fetch_lock:
-                        if buffer:
-                            idx = self.playback_indices.get(self.source_id, 0)
-                            if idx >= len(buffer):
-                                idx = 0
-
-                            self.current_surface, self.last_image_time, image_id = buffer[idx]
-                            if image_id != current_image_id:
-                                current_image_id = image_id
-                                self.needs_redraw = True
-                            self.playback_indices[self.source_id] = (idx + 1) % len(buffer)
-
-            # Handle fade animation
-            if self.mode_message_alpha > 0:
-                self.mode_message_alpha = max(0, self.mode_message_alpha - 5)
-                self.needs_redraw = True
+                # Only redraw if something changed
+                if self.needs_redraw:
+                    draw_started = time.perf_counter()
+                    self.screen.fill((0, 0, 0))
 
-            # Only redraw if something changed
-            if self.needs_redraw:
-                self.screen.fill((0, 0, 0))
+                    if self.grid:
+                        self._draw_grid()
+                    elif self.current_surface and self.tiles.zoomed:
+                        self.tiles.draw(self.screen, self._client(self.source_id), self.current_image_id or "",
+                                        self.current_surface)
+                    elif self.current_surface:
+                        scaled = self._get_scaled_surface(self.current_surface, self.current_image_id or "")
+                        x = (self.window_size[0] - scaled.get_width()) // 2
+                        y = (self.window_size[1] - scaled.get_height()) // 2
+                        self.screen.blit(scaled, (x, y))
 
-                if self.current_surface:
-                    scaled = self._get_scaled_surface(self.current_surface, current_image_id or "")
-                    x = (self.window_size[0] - scaled.get_width()) // 2
-                    y = (self.window_size[1] - scaled.get_height()) // 2
-                    self.screen.blit(scaled, (x, y))
+                    if self.show_help:
+                        self._draw_help()
+                    else:
+                        self._draw_info()
+                        if self.show_metrics:
+                            self._draw_metrics()
+                    self.metrics.record('draw', time.perf_counter() - draw_started)
 
-                if self.show_help:
-                    self._draw_help()
-                else:
-                    self._draw_info()
+                    with self.metrics.timed('flip'):
+                        pygame.display.flip()
+                    self.needs_redraw = False
 
-                pygame.display.flip()
-                self.needs_redraw = False
+                    if self.first_frame_at is None and (self.current_surface or any(self.grid_frames)):
+                        self.first_frame_at = time.monotonic()
+                        print(f"Time to first frame: {(self.first_frame_at - self.started) * 1000:.0f} ms")
+        finally:
+            # Also on Ctrl+C, or the prefetch pools keep the interpreter alive until they drain
+            self._stop_background()
+            pygame.quit()
+            self.decoder.shutdown()
+            print(self.fetcher.summary())
 
-            # Frame rate control
-            if self.mode == 'video':
-                self.clock.tick(60)
-            elif self.mode_message_alpha > 0:
-                self.clock.tick(60)  # Higher rate during animations
-        
-        pygame.quit()
+
+def _encoder_command(output: Path, fps: float, width: int) -> list[str]:
+    """ffmpeg reading a stream of JPEGs on stdin and encoding them by the output's extension."""
+    # Tiers can mix when the cache holds sharper copies, so every frame is scaled to one width
+    scale = f"scale={width}:-2:flags=lanczos"
+    suffix = output.suffix.lower()
+    if suffix == '.gif':
+        # A palette per frame keeps ffmpeg streaming; a global one would buffer the whole video
+        codec = ['-filter_complex', f"[0:v]{scale},split[a][b];[a]palettegen=stats_mode=single[p];"
+                                    f"[b][p]paletteuse=new=1", '-loop', '0']
+    elif suffix in ('.png', '.apng'):
+        codec = ['-vf', scale, '-f', 'apng', '-plays', '0', '-pix_fmt', 'rgb24']
+    else:
+        codec = ['-vf', scale, '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '20', '-movflags', '+faststart']
+    return [
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'image2pipe', '-framerate', str(fps), '-c:v', 'mjpeg', '-i', '-',
+        *codec, str(output),
+    ]
+
+
+def _export_frames(fetcher: Fetcher, client: HelioviewerClient, source_id: SourceId,
+                   slots: Iterable[datetime], tier: int) -> Iterator[tuple[str, bytes]]:
+    """JPEG bytes for each slot in order, as (timestamp, bytes), each image only once.
+
+    Slots are resolved and fetched on a small pool, at most EXPORT_LOOKAHEAD ahead of the
+    consumer, so only that many frames are ever held in memory.
+    """
+    def fetch(slot: datetime) -> tuple[str, str, bytes] | None:
+        if not (data := client.resolve_slot(slot)) or 'id' not in data:
+            return None
+        timestamp = data.get('date', 'Unknown')
+        if not (fetched := fetcher.fetch(client, source_id, data['id'], timestamp, tier)):
+            return None
+        return data['id'], timestamp, fetched[0]
+
+    last_id = None
+    with ThreadPoolExecutor(max_workers=EXPORT_LOOKAHEAD, thread_name_prefix='export') as pool:
+        pending: deque[Future] = deque()
+        slots = iter(slots)
+        while True:
+            while len(pending) < EXPORT_LOOKAHEAD and (slot := next(slots, None)) is not None:
+                pending.append(pool.submit(fetch, slot))
+            if not pending:
+                return
+            # Slots inside a gap in the data resolve to the same image; show it once
+            if (result := pending.popleft().result()) and result[0] != last_id:
+                last_id, timestamp, data = result
+                yield timestamp, data
+
+
+def export_timeline(source_id: SourceId, start: datetime, end: datetime, output: Path,
+                    step: timedelta = timedelta(minutes=SLOT_MINUTES), fps: float = EXPORT_FPS,
+                    tier: int = DEFAULT_TIER) -> int:
+    """Encode a source's frames from start to end into a video, without opening a window.
+
+    Cached JPEG bytes stream straight into ffmpeg, which decodes them itself, so frames
+    never become surfaces and memory stays flat however long the range is. Returns the
+    number of frames written.
+    """
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("ffmpeg not found on PATH; it is needed to encode the export")
+    cache = CacheManager()
+    fetcher = Fetcher(cache)
+    client = HelioviewerClient(source_id, ResolutionCache(), fetcher.session)
+    slot_count = int((end - start) / step) + 1
+    slots = (start + i * step for i in range(slot_count))
+
+    print(f"Exporting up to {slot_count} frames of source {source_id} to {output}...")
+    started = time.monotonic()
+    written = 0
+    encoder = subprocess.Popen(_encoder_command(output, fps, tier), stdin=subprocess.PIPE)
+    try:
+        for timestamp, data in _export_frames(fetcher, client, source_id, slots, tier):
+            encoder.stdin.write(data)
+            written += 1
+            if written % 100 == 0:
+                print(f"  {written} frames, at {timestamp}")
+    except BrokenPipeError:
+        pass  # ffmpeg quit; its exit status says why
+    finally:
+        try:
+            encoder.stdin.close()
+        except BrokenPipeError:
+            pass
+        status = encoder.wait()
+    if status != 0:
+        raise RuntimeError(f"ffmpeg exited with status {status}")
+    print(f"Exported {written} frames in {time.monotonic() - started:.1f}s ({fetcher.summary()})")
+    return written
+
+
+def _export_date(value: str) -> datetime:
+    if (parsed := _parse_date(value)) is None:
+        raise argparse.ArgumentTypeError(f"not a date: {value!r}")
+    return parsed
 
 
 def main():
@@ -693,9 +3102,15 @@ Keyboard shortcuts:
   F / F11      - Toggle fullscreen
   M / Space    - Switch between Live and Video modes
   ← / →        - Cycle through wavelengths
+  G            - Toggle the multi-wavelength grid
   ↑ / ↓        - Adjust video FPS (0.5-30)
   b / B        - Decrease/increase buffer size
+  X            - Cycle running-difference, base-difference and normal frames
+  [ / ]        - Lower/raise the difference contrast
+  + / - / 0    - Zoom in, out, back to the whole disk (or the mouse wheel)
+  W/A/S/D      - Pan while zoomed in (or drag)
   I            - Toggle info display
+  P            - Toggle performance metrics
   H            - Show help
   ESC / Q / Ctrl+C - Quit
 
@@ -710,13 +3125,96 @@ Available sources (--source):
                        help='Initial image source/wavelength (default: 304)')
     parser.add_argument('--mode', default='video', choices=['live', 'video'],
                        help='Initial display mode (default: video)')
-    parser.add_argument('--poll-interval', type=int, default=60,
-                       help='Seconds between API polls (default: 60)')
+    parser.add_argument('--poll-interval', type=int, default=POLL_INTERVAL,
+                       help=f'Seconds between API polls until the source cadence is learned (default: {POLL_INTERVAL})')
+    parser.add_argument('--grid', type=lambda value: value.split(','), metavar='SOURCES',
+                       help=f'Start in the grid view with these comma-separated sources, e.g. 304,171,193,211 '
+                            f'(G toggles it; default tiles: the current source and the next {GRID_SIZE - 1})')
+    parser.add_argument('--export', type=Path, metavar='FILE',
+                       help='Encode the source between --start and --end into FILE (.mp4, .gif or .apng) '
+                            'with ffmpeg, without opening a window, and exit')
+    parser.add_argument('--start', type=_export_date,
+                       help='Export range start, UTC, e.g. 2024-05-10T00:00 (default: 24 hours before --end)')
+    parser.add_argument('--end', type=_export_date,
+                       help='Export range end, UTC (default: now)')
+    parser.add_argument('--step', type=float, default=SLOT_MINUTES,
+                       help=f'Minutes between exported frames (default: {SLOT_MINUTES})')
+    parser.add_argument('--export-fps', type=float, default=EXPORT_FPS,
+                       help=f'Frame rate of the exported video (default: {EXPORT_FPS})')
+    parser.add_argument('--export-size', type=int, default=DEFAULT_TIER, choices=RESOLUTION_TIERS,
+                       help=f'Width of the exported video (default: {DEFAULT_TIER})')
+    parser.add_argument('--serve', nargs='?', const=f"127.0.0.1:{SERVE_PORT}", metavar='[HOST:]PORT',
+                       help=f'Serve the source (or the --grid sources) as MJPEG and JSON over HTTP instead of '
+                            f'opening a window (default: 127.0.0.1:{SERVE_PORT})')
+    parser.add_argument('--serve-size', type=int, default=DEFAULT_TIER, choices=RESOLUTION_TIERS,
+                       help=f'Width of the served frames (default: {DEFAULT_TIER})')
+    parser.add_argument('--difference', choices=['running', 'base'],
+                       help='Start showing running-difference (each frame minus the previous) or '
+                            'base-difference (minus the oldest buffered) frames; X cycles them')
     parser.add_argument('--fullscreen', action='store_true',
                        help='Start in fullscreen mode')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                       help=f'Frame memory budget in MB, a quarter of it for difference frames while '
+                            f'they are shown (default: {DEFAULT_MEMORY_BUDGET_MB})')
+    parser.add_argument('--decode-workers', type=int, default=DECODE_WORKERS,
+                       help=f'JPEG decode processes, 0 to decode in-process (default: {DECODE_WORKERS})')
+    parser.add_argument('--warm-budget', type=int, default=WARM_BUDGET_MB,
+                       help=f'MB of frames preloaded for the neighbouring sources, 0 to disable (default: {WARM_BUDGET_MB})')
+    parser.add_argument('--decoded-cache', type=int, default=0, metavar='FRAMES',
+                       help='Keep up to this many decoded frames per source on disk, so restarts skip '
+                            'decoding. They are stored beside the cache, outside --cache-max-mb, and take '
+                            'edge x edge x 3 bytes each for the window\'s short edge: about 3 MB at 1024 px, '
+                            '12 MB at 2048 (default: 0, off)')
+    parser.add_argument('--retain-hours', type=float, default=RETAIN_HOURS,
+                       help=f'Drop buffered frames older than this many hours (default: {RETAIN_HOURS})')
+    parser.add_argument('--retain-frames', type=int, default=RETAIN_MAX_FRAMES,
+                       help=f'Buffered frames kept per source at most (default: {RETAIN_MAX_FRAMES})')
+    parser.add_argument('--release-after', type=float, default=RELEASE_IDLE_AFTER / 60,
+                       help=f'Free a source\'s frames this many minutes after switching away (default: {RELEASE_IDLE_AFTER // 60})')
+    parser.add_argument('--metrics-log', type=Path, metavar='FILE',
+                       help='Append a JSON line of per-stage timings and counters to FILE periodically')
+    parser.add_argument('--metrics-interval', type=float, default=METRICS_LOG_INTERVAL,
+                       help=f'Seconds between metrics log lines (default: {METRICS_LOG_INTERVAL})')
+    parser.add_argument('--cache-max-mb', type=int, default=CACHE_MAX_MB,
+                       help=f'Disk cache size cap in MB (default: {CACHE_MAX_MB})')
+    parser.add_argument('--cache-source-mb', type=int, default=CACHE_SOURCE_QUOTA_MB,
+                       help=f'Disk cache quota per source in MB (default: {CACHE_SOURCE_QUOTA_MB})')
+    parser.add_argument('--tile-cache-mb', type=int, default=TILE_CACHE_MB,
+                       help=f'Disk cache cap for zoomed-in tiles in MB (default: {TILE_CACHE_MB})')
+    parser.add_argument('--cache-max-days', type=float, default=CACHE_MAX_DAYS,
+                       help=f'Evict cached images older than this many days (default: {CACHE_MAX_DAYS})')
     
     args = parser.parse_args()
+    if unknown := [name for name in args.grid or [] if name not in SOURCES]:
+        parser.error(f"unknown grid sources: {', '.join(unknown)}")
+
+    if args.export:
+        end = args.end or datetime.now(timezone.utc)
+        start = args.start or end - timedelta(hours=24)
+        if start > end:
+            parser.error("--start is after --end")
+        if args.step <= 0:
+            parser.error("--step must be positive")
+        try:
+            export_timeline(SOURCES[args.source], start, end, args.export, timedelta(minutes=args.step),
+                            args.export_fps, args.export_size)
+        except (RuntimeError, OSError) as e:
+            print(f"Export failed: {e}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            print("\nExport interrupted")
+            sys.exit(1)
+        return
     
+    if args.serve:
+        host, _, port = args.serve.rpartition(':')
+        if not port.isdigit():
+            parser.error(f"--serve expects [HOST:]PORT, got {args.serve!r}")
+        # Serving draws nothing, so it needs neither a window nor a decoder
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        args.mode = 'video'
+        args.decode_workers = 0
+
     print(f"Starting Sun Viewer...")
     print(f"Mode: {args.mode}, Source: {args.source}")
     print(f"Press H for help, F for fullscreen")
@@ -724,9 +3222,38 @@ Available sources (--source):
     viewer = SunViewer(
         source_id=SOURCES[args.source],
         initial_mode=args.mode,
-        poll_interval=args.poll_interval
+        poll_interval=args.poll_interval,
+        memory_budget_mb=args.memory_budget,
+        decode_workers=args.decode_workers,
+        pixel_frames=args.decoded_cache,
+        warm_budget_mb=args.warm_budget,
+        grid=[SOURCES[name] for name in args.grid] if args.grid else None,
+        metrics_log=args.metrics_log,
+        metrics_interval=args.metrics_interval,
+        difference=args.difference,
+        cache_policy=CachePolicy(
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            source_quota_bytes=args.cache_source_mb * 1024 * 1024,
+            max_age=timedelta(days=args.cache_max_days),
+            tile_max_bytes=args.tile_cache_mb * 1024 * 1024,
+        ),
+        retention=RetentionPolicy(
+            window=timedelta(hours=args.retain_hours),
+            max_frames=args.retain_frames,
+            idle_release=args.release_after * 60,
+        ),
     )
     
+    if args.serve:
+        try:
+            viewer.serve(host or '127.0.0.1', int(port), args.serve_size)
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+        except OSError as e:
+            print(f"Cannot serve on {args.serve}: {e}")
+            sys.exit(1)
+        return
+
     if args.fullscreen:
         viewer._toggle_fullscreen()
     
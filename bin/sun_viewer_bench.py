@@ -0,0 +1,448 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# dependencies = [
+#   "requests",
+#   "pillow",
+#   "pygame",
+#   "numpy",
+# ]
+# requires-python = ">=3.10"
+# ///
+
+"""Offline benchmarks for sun_viewer.py, against a local stand-in for the Helioviewer API.
+
+The stand-in answers getClosestImage and downloadImage with synthetic JPEGs, after a
+configurable latency and with a configurable failure rate. Each scenario runs the
+viewer in its own process, under the SDL dummy driver, so RSS and cold starts are
+measured from scratch:
+
+  prefetch_cold / prefetch_warm  historical prefetch from an empty, then a filled cache
+  first_frame_cold / _warm       time from start-up to the first frame on screen
+  render                         per-frame cost of decode, scale, draw and flip
+  memory                         RSS per buffered compressed frame and per decoded one
+  metadata                       cost of a cache save as the index grows
+  polling                        live poll delay on a simulated clock, early and late in a long run
+
+Results are written as JSON; --compare prints the change against an earlier run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Final
+from urllib.parse import parse_qs, urlparse
+
+RESULT_PREFIX: Final = 'BENCH_RESULT '  # Marks the line a scenario process reports on
+IMAGE_VARIANTS: Final = 8  # Distinct synthetic images per width, so frames don't all decode alike
+DEFAULT_FRAMES: Final = 120
+DEFAULT_CADENCE: Final = 60  # Seconds between the stand-in's images
+DEFAULT_METADATA_ENTRIES: Final = 20000
+METADATA_STEP: Final = 2000  # Index sizes at which save cost is sampled
+SCENARIO_TIMEOUT: Final = 300
+SOURCE_ID: Final = 13
+PAGE_SIZE: Final = os.sysconf('SC_PAGE_SIZE')
+# The polling scenario's feed: LASCO C2 cadence, and a lag like the API's for it
+POLL_CADENCE: Final = 720
+POLL_LAG: Final = 210
+POLL_LAG_JITTER: Final = 60
+POLL_HOURS: Final = 7 * 24
+
+
+class FakeHelioviewer(ThreadingHTTPServer):
+    """getClosestImage and downloadImage, answered locally with synthetic images."""
+
+    daemon_threads = True
+
+    def __init__(self, latency: float, jitter: float, failure_rate: float, cadence: int):
+        super().__init__(('127.0.0.1', 0), FakeHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.cadence = cadence
+        self.images: dict[tuple[int, int], bytes] = {}
+        self.lock = threading.Lock()
+        self.stats = dict.fromkeys(('lookups', 'downloads', 'failures', 'bytes'), 0)
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v2/"
+
+    def handle_error(self, request, client_address):
+        # Scenario processes exit without closing their connections
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def image(self, width: int, variant: int) -> bytes:
+        key = (width, variant)
+        with self.lock:
+            if (data := self.images.get(key)) is not None:
+                return data
+        data = synthetic_jpeg(width, variant)
+        with self.lock:
+            return self.images.setdefault(key, data)
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    server: FakeHelioviewer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        server = self.server
+        time.sleep(max(0.0, random.gauss(server.latency, server.jitter)))
+        if random.random() < server.failure_rate:
+            server.count('failures')
+            self._send(503, b'{"error": "stand-in failure"}', 'application/json')
+        elif url.path.endswith('/getClosestImage/'):
+            server.count('lookups')
+            target = datetime.strptime(query['date'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+            epoch = int(target.timestamp()) // server.cadence * server.cadence
+            date = datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            body = json.dumps({'id': f"{query['sourceId']}{epoch}", 'date': date})
+            self._send(200, body.encode(), 'application/json')
+        elif url.path.endswith('/downloadImage/'):
+            server.count('downloads')
+            variant = int(query['id']) // server.cadence % IMAGE_VARIANTS
+            body = server.image(int(query.get('width', 1024)), variant)
+            server.count('bytes', len(body))
+            self._send(200, body, 'image/jpeg')
+        else:
+            self._send(404, b'', 'text/plain')
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def synthetic_jpeg(width: int, variant: int) -> bytes:
+    """A noisy disc on black, roughly as compressible as a real solar image."""
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(variant)
+    image = Image.effect_noise((width, width), 40 + 8 * variant).convert('RGB')
+    disc = Image.new('L', (width, width))
+    margin = width // 10
+    ImageDraw.Draw(disc).ellipse((margin, margin, width - margin, width - margin), fill=255)
+    tint = Image.new('RGB', (width, width), (rng.randrange(128, 256), rng.randrange(64, 192), rng.randrange(0, 96)))
+    image = Image.composite(Image.blend(image, tint, 0.6), Image.new('RGB', (width, width)), disc)
+    image = image.filter(ImageFilter.GaussianBlur(width / 512))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def rss() -> int:
+    """Resident set size of this process in bytes."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def _timings(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else None,
+        'p50_ms': samples[len(samples) // 2] * 1000 if samples else None,
+        'p95_ms': samples[int(len(samples) * 0.95)] * 1000 if samples else None,
+    }
+
+
+# Scenarios, each run in a fresh process with the viewer pointed at the stand-in
+
+def _viewer(sv, frames: int, **kwargs):
+    viewer = sv.SunViewer(source_id=SOURCE_ID, **kwargs)
+    viewer.prefetch_frames = frames
+    return viewer
+
+
+def scenario_prefetch(sv, args) -> dict:
+    viewer = _viewer(sv, args.frames)
+    started = time.monotonic()
+    viewer._prefetch_historical(SOURCE_ID, threading.Event())
+    elapsed = time.monotonic() - started
+    buffered = len(viewer._snapshot(SOURCE_ID))
+    return {
+        'frames': buffered,
+        'seconds': elapsed,
+        'frames_per_s': buffered / elapsed if elapsed else None,
+        'mb_per_s': viewer.buffers[SOURCE_ID].nbytes / elapsed / 1e6 if elapsed else None,
+        'fetcher': dict(viewer.fetcher.stats),
+    }
+
+
+def scenario_first_frame(sv, args) -> dict:
+    viewer = _viewer(sv, args.frames)
+
+    def stop_when_shown():
+        deadline = time.monotonic() + SCENARIO_TIMEOUT / 2
+        while viewer.first_frame_at is None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        viewer.running = False
+
+    threading.Thread(target=stop_when_shown, daemon=True).start()
+    viewer.run()
+    shown = viewer.first_frame_at
+    return {'ms': (shown - viewer.started) * 1000 if shown else None}
+
+
+def scenario_render(sv, args) -> dict:
+    import pygame
+
+    viewer = _viewer(sv, args.frames)
+    viewer._load_from_cache(SOURCE_ID)
+    frames = viewer._snapshot(SOURCE_ID)
+
+    def render_pass() -> list[float]:
+        samples = []
+        for frame in frames:
+            started = time.perf_counter()
+            viewer.screen.fill((0, 0, 0))
+            surface = viewer.frames.get(SOURCE_ID, frame)
+            viewer.screen.blit(viewer._get_scaled_surface(surface, frame[2]), (0, 0))
+            viewer._draw_info()
+            pygame.display.flip()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    # The first pass decodes every frame; the second finds what the budget kept
+    return {'frames': len(frames), 'decoding': _timings(render_pass()), 'decoded': _timings(render_pass())}
+
+
+def scenario_memory(sv, args) -> dict:
+    # A budget large enough that nothing is evicted while decoding
+    viewer = _viewer(sv, args.frames, memory_budget_mb=4096)
+    before = rss()
+    count = viewer._load_from_cache(SOURCE_ID)
+    buffered = rss()
+    frames = viewer._snapshot(SOURCE_ID)
+    for frame in frames:
+        viewer.frames.get(SOURCE_ID, frame)
+    decoded = rss()
+    return {
+        'frames': count,
+        'compressed_bytes_per_frame': viewer.buffers[SOURCE_ID].nbytes / count if count else None,
+        'rss_per_buffered_frame': (buffered - before) / count if count else None,
+        'rss_per_decoded_frame': (decoded - buffered) / len(frames) if frames else None,
+        'rss_total': decoded,
+    }
+
+
+def scenario_metadata(sv, args) -> dict:
+    cache = sv.CacheManager(Path(tempfile.mkdtemp(dir=sv.CACHE_DIR)))
+    data = sv.JPEG_MAGIC + bytes(1024)
+    saves = []
+    for size in range(0, args.metadata_entries, METADATA_STEP):
+        started = time.perf_counter()
+        for i in range(size, size + METADATA_STEP):
+            cache.save(SOURCE_ID, f"{SOURCE_ID}{i}", data, f"2024-01-01 00:00:{i % 60:02d}", sv.DEFAULT_TIER)
+        saves.append({'entries': size + METADATA_STEP,
+                      'save_ms': (time.perf_counter() - started) / METADATA_STEP * 1000})
+    started = time.perf_counter()
+    sv.CacheManager(cache.cache_dir)
+    return {'saves': saves, 'reload_ms': (time.perf_counter() - started) * 1000}
+
+
+def scenario_polling(sv, args) -> dict:
+    # Runs on a simulated clock: the feed's images each turn up after a random lag, and
+    # every poll returns the newest one that has
+    rng = random.Random(0)
+    clock = start = time.time()
+    sv.time.time = lambda: clock
+    images = []  # (image time, time it turns up in the API)
+    at = start - 5 * POLL_CADENCE
+    while at < start + POLL_HOURS * 3600 + POLL_CADENCE:
+        images.append((at, at + max(0.0, rng.gauss(POLL_LAG, POLL_LAG_JITTER))))
+        at += POLL_CADENCE
+
+    poller = sv.CadencePoller(sv.POLL_INTERVAL)
+    seen, delays = set(), []  # Seconds from an image turning up to a poll returning it
+    while clock < start + POLL_HOURS * 3600:
+        newest = max(image for image in images if image[1] <= clock)
+        if newest[0] not in seen:
+            if seen:
+                delays.append(clock - newest[1])
+            seen.add(newest[0])
+        poller.observe(datetime.fromtimestamp(newest[0], timezone.utc).isoformat())
+        clock = poller.next_poll_at
+
+    # Delays that grow from the first quarter of the run to the last would mean the
+    # schedule drifts later
+    quarter = len(delays) // 4
+    return {
+        'polls': poller.stats['polls'],
+        'images': len(delays),
+        'first_quarter_mean_s': statistics.fmean(delays[:quarter]) if quarter else None,
+        'last_quarter_mean_s': statistics.fmean(delays[-quarter:]) if quarter else None,
+        'max_s': max(delays, default=None),
+    }
+
+
+SCENARIOS: Final = {
+    'prefetch': scenario_prefetch,
+    'first_frame': scenario_first_frame,
+    'render': scenario_render,
+    'memory': scenario_memory,
+    'metadata': scenario_metadata,
+    'polling': scenario_polling,
+}
+
+# (result name, scenario, whether it starts from an empty cache), in the order they run.
+# The rest share one cache, which prefetch_cold fills.
+PLAN: Final = (
+    ('prefetch_cold', 'prefetch', True),
+    ('prefetch_warm', 'prefetch', False),
+    ('first_frame_cold', 'first_frame', True),
+    ('first_frame_warm', 'first_frame', False),
+    ('render', 'render', False),
+    ('memory', 'memory', False),
+    ('metadata', 'metadata', False),
+    ('polling', 'polling', True),
+)
+
+
+def run_scenario(name: str, args):
+    """Body of a scenario process: import the viewer as configured by the parent and report."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import sun_viewer
+
+    result = SCENARIOS[name](sun_viewer, args)
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+    os._exit(0)  # Skip joining the viewer's daemon threads and worker pools
+
+
+def spawn(name: str, args, server: FakeHelioviewer, cache_dir: Path) -> dict | None:
+    env = dict(os.environ, SUN_VIEWER_API=server.api_base, SUN_VIEWER_CACHE=str(cache_dir),
+               SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    command = [sys.executable, __file__, '--scenario', name, '--frames', str(args.frames),
+               '--metadata-entries', str(args.metadata_entries)]
+    try:
+        proc = subprocess.run(command, env=env, capture_output=True, text=True, timeout=SCENARIO_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        print(f"  timed out after {SCENARIO_TIMEOUT}s", file=sys.stderr)
+        return None
+    if args.verbose:
+        sys.stderr.write(proc.stdout + proc.stderr)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    print(f"  failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}", file=sys.stderr)
+    return None
+
+
+def _flatten(value, prefix: str = '') -> dict[str, float]:
+    if isinstance(value, dict):
+        return {k: v for key, item in value.items() for k, v in _flatten(item, f"{prefix}{key}.").items()}
+    if isinstance(value, list):
+        return {k: v for i, item in enumerate(value) for k, v in _flatten(item, f"{prefix}{i}.").items()}
+    return {prefix[:-1]: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+
+
+def compare(baseline: dict, current: dict):
+    """Print each metric present in both runs, with its relative change."""
+    old, new = _flatten(baseline['results']), _flatten(current['results'])
+    width = max((len(key) for key in new), default=0)
+    for key, value in new.items():
+        if (before := old.get(key)) is None:
+            continue
+        change = f"{(value - before) / before * 100:+7.1f}%" if before else '      -'
+        print(f"{key:<{width}}  {before:>12.3f} -> {value:>12.3f}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark sun_viewer.py offline, against a local Helioviewer stand-in',
+        epilog='Writes JSON results to stdout or --output. Needs Linux, for RSS from /proc.')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                       help=f'Frames to prefetch, render and buffer (default: {DEFAULT_FRAMES})')
+    parser.add_argument('--latency', type=float, default=50,
+                       help='Mean stand-in response latency in ms (default: 50)')
+    parser.add_argument('--jitter', type=float, default=10,
+                       help='Standard deviation of the latency in ms (default: 10)')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                       help='Fraction of requests answered with a 503 (default: 0)')
+    parser.add_argument('--cadence', type=int, default=DEFAULT_CADENCE,
+                       help=f'Seconds between stand-in images (default: {DEFAULT_CADENCE})')
+    parser.add_argument('--metadata-entries', type=int, default=DEFAULT_METADATA_ENTRIES,
+                       help=f'Index size the metadata benchmark grows to (default: {DEFAULT_METADATA_ENTRIES})')
+    parser.add_argument('--only', action='append', choices=[name for name, _, _ in PLAN],
+                       help='Run just this benchmark; can be repeated')
+    parser.add_argument('--output', type=Path, help='Write the JSON results here instead of stdout')
+    parser.add_argument('--compare', type=Path, metavar='BASELINE',
+                       help='Print the change against the results of an earlier run')
+    parser.add_argument('--verbose', action='store_true', help="Show the viewer's own output")
+    parser.add_argument('--scenario', choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args.scenario, args)
+
+    server = FakeHelioviewer(args.latency / 1000, args.jitter / 1000, args.failure_rate, args.cadence)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='sun_viewer_bench_') as workdir:
+        shared = Path(workdir) / 'cache'
+        shared.mkdir()
+        filled = False
+        for name, scenario, cold in PLAN:
+            if args.only and name not in args.only:
+                continue
+            cache_dir = Path(workdir) / name if cold and name != 'prefetch_cold' else shared
+            cache_dir.mkdir(exist_ok=True)
+            if not cold and not filled:
+                print("Filling the cache...", file=sys.stderr)
+                spawn('prefetch', args, server, shared)
+            filled = filled or cache_dir == shared
+            print(f"Running {name}...", file=sys.stderr)
+            started = time.monotonic()
+            results[name] = spawn(scenario, args, server, cache_dir)
+            print(f"  done in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    server.shutdown()
+
+    report = {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'params': {k: getattr(args, k) for k in ('frames', 'latency', 'jitter', 'failure_rate',
+                                                     'cadence', 'metadata_entries')},
+        },
+        'server': server.stats,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == '__main__':
+    main()